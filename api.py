@@ -3,6 +3,7 @@
 import os
 import re
 import time
+from functools import lru_cache
 from threading import Thread
 from typing import List, Dict, Optional
 
@@ -26,6 +27,7 @@ import uuid
 import mysql.connector
 from mysql.connector import pooling
 from mysql.connector import Error as MySQLError
+from mysql.connector.constants import ClientFlag
 
 from src.middleware import limiter, rate_limit_exceeded_handler
 from src.main import LessonProcessor
@@ -148,12 +150,12 @@ class SupabaseClient:
             elif start_time and end_time:
                 query = query.gte('meeting_time', start_time).lte('meeting_time', end_time)
 
-            response = query.order('processing_completed_at', desc=True).limit(1).execute()
+            response = query.order('processing_completed_at', desc=True).limit(1).maybe_single().execute()
 
-            if not response.data:
+            transcript_data = response.data if response else None
+            if transcript_data is None:
                 return None
 
-            transcript_data = response.data[0]
             logger.info(f"Transcript found (ID: {transcript_data.get('id')}, length: {transcript_data.get('transcript_length', 0)})")
             return transcript_data
 
@@ -264,7 +266,9 @@ mysql_config = {
     "pool_reset_session": True,
     "autocommit": True,
     "charset": "utf8mb4",
-    "collation": "utf8mb4_unicode_ci"
+    "collation": "utf8mb4_unicode_ci",
+    # Report matched (not changed) rows so UPDATE rowcount doubles as an ownership check
+    "client_flags": [ClientFlag.FOUND_ROWS]
 }
 
 mysql_pool = None
@@ -1483,14 +1487,7 @@ async def get_word_list(request: Request, list_id: str, user_id: str):
 async def update_word_list(request: Request, list_id: str, user_id: str, data: dict):
     """Update a word list"""
     try:
-        # Check if list exists and belongs to user
-        check_query = "SELECT id FROM word_lists WHERE id = %s AND user_id = %s"
-        existing = execute_query(check_query, (list_id, user_id), fetch_one=True)
-
-        if not existing:
-            raise HTTPException(status_code=404, detail="Word list not found")
-
-        # Update the list
+        # Update the list (ownership is enforced by the WHERE clause)
         update_fields = []
         params = []
 
@@ -1515,7 +1512,11 @@ async def update_word_list(request: Request, list_id: str, user_id: str, data: d
             WHERE id = %s AND user_id = %s
         """
 
-        execute_query(query, tuple(params), fetch_all=False)
+        result = execute_query(query, tuple(params), fetch_all=False)
+
+        if result == 0:
+            raise HTTPException(status_code=404, detail="Word list not found")
+
         logger.info(f"[WORD_LISTS] Updated list {list_id} for user {user_id}")
         return {"message": "Word list updated successfully"}
 
@@ -1531,9 +1532,13 @@ async def update_word_list(request: Request, list_id: str, user_id: str, data: d
 async def delete_word_list(request: Request, list_id: str, user_id: str):
     """Delete a word list"""
     try:
-        # Delete words first (foreign key constraint)
-        delete_words_query = "DELETE FROM words WHERE word_list_id = %s"
-        execute_query(delete_words_query, (list_id,), fetch_all=False)
+        # Delete words first (foreign key constraint), only from the user's own list
+        delete_words_query = """
+            DELETE w FROM words w
+            JOIN word_lists wl ON w.word_list_id = wl.id
+            WHERE wl.id = %s AND wl.user_id = %s
+        """
+        execute_query(delete_words_query, (list_id, user_id), fetch_all=False)
 
         # Delete the list
         delete_list_query = "DELETE FROM word_lists WHERE id = %s AND user_id = %s"
@@ -1542,6 +1547,7 @@ async def delete_word_list(request: Request, list_id: str, user_id: str):
         if result == 0:
             raise HTTPException(status_code=404, detail="Word list not found")
 
+        _cached_pronunciation.cache_clear()
         logger.info(f"[WORD_LISTS] Deleted list {list_id} for user {user_id}")
         return {"message": "Word list deleted successfully"}
 
@@ -1557,20 +1563,16 @@ async def delete_word_list(request: Request, list_id: str, user_id: str):
 async def toggle_favorite(request: Request, list_id: str, user_id: str):
     """Toggle favorite status of a word list"""
     try:
-        # Check if list exists
-        check_query = "SELECT id FROM word_lists WHERE id = %s AND user_id = %s"
-        existing = execute_query(check_query, (list_id, user_id), fetch_one=True)
-
-        if not existing:
-            raise HTTPException(status_code=404, detail="Word list not found")
-
-        # Toggle favorite
+        # Toggle favorite (ownership is enforced by the WHERE clause)
         toggle_query = """
             UPDATE word_lists
             SET is_favorite = NOT is_favorite, updated_at = %s
             WHERE id = %s AND user_id = %s
         """
-        execute_query(toggle_query, (utc_now_iso(), list_id, user_id), fetch_all=False)
+        result = execute_query(toggle_query, (utc_now_iso(), list_id, user_id), fetch_all=False)
+
+        if result == 0:
+            raise HTTPException(status_code=404, detail="Word list not found")
 
         # Get updated status
         status_query = "SELECT is_favorite FROM word_lists WHERE id = %s"
@@ -1625,45 +1627,40 @@ async def add_word_to_list(request: Request, list_id: str, user_id: str, data: d
 async def update_word_in_list(request: Request, list_id: str, word_id: str, user_id: str, data: dict):
     """Update a word in a word list"""
     try:
-        # Check if word exists and belongs to user's list
-        check_query = """
-            SELECT w.id FROM words w
-            JOIN word_lists wl ON w.word_list_id = wl.id
-            WHERE w.id = %s AND w.word_list_id = %s AND wl.user_id = %s
-        """
-        existing = execute_query(check_query, (word_id, list_id, user_id), fetch_one=True)
-
-        if not existing:
-            raise HTTPException(status_code=404, detail="Word not found")
-
-        # Update the word
+        # Update the word (ownership is enforced by the join on word_lists)
         update_fields = []
         params = []
 
         if 'word' in data:
-            update_fields.append("word = %s")
+            update_fields.append("w.word = %s")
             params.append(data['word'])
         if 'translation' in data:
-            update_fields.append("translation = %s")
+            update_fields.append("w.translation = %s")
             params.append(data['translation'])
         if 'notes' in data:
-            update_fields.append("notes = %s")
+            update_fields.append("w.notes = %s")
             params.append(data['notes'])
 
         if not update_fields:
             raise HTTPException(status_code=400, detail="No fields to update")
 
-        update_fields.append("updated_at = %s")
+        update_fields.append("w.updated_at = %s")
         params.append(utc_now_iso())
-        params.append(word_id)
+        params.extend([word_id, list_id, user_id])
 
         query = f"""
-            UPDATE words
+            UPDATE words w
+            JOIN word_lists wl ON w.word_list_id = wl.id
             SET {', '.join(update_fields)}
-            WHERE id = %s
+            WHERE w.id = %s AND w.word_list_id = %s AND wl.user_id = %s
         """
 
-        execute_query(query, tuple(params), fetch_all=False)
+        result = execute_query(query, tuple(params), fetch_all=False)
+
+        if result == 0:
+            raise HTTPException(status_code=404, detail="Word not found")
+
+        _cached_pronunciation.cache_clear()
         logger.info(f"[WORD_LISTS] Updated word {word_id}")
         return {"message": "Word updated successfully"}
 
@@ -1679,24 +1676,18 @@ async def update_word_in_list(request: Request, list_id: str, word_id: str, user
 async def delete_word_from_list(request: Request, list_id: str, word_id: str, user_id: str):
     """Delete a word from a word list"""
     try:
-        # Check if word exists and belongs to user's list
-        check_query = """
-            SELECT w.id FROM words w
+        # Delete the word (ownership is enforced by the join on word_lists)
+        delete_query = """
+            DELETE w FROM words w
             JOIN word_lists wl ON w.word_list_id = wl.id
             WHERE w.id = %s AND w.word_list_id = %s AND wl.user_id = %s
         """
-        existing = execute_query(check_query, (word_id, list_id, user_id), fetch_one=True)
-
-        if not existing:
-            raise HTTPException(status_code=404, detail="Word not found")
-
-        # Delete the word
-        delete_query = "DELETE FROM words WHERE id = %s"
-        result = execute_query(delete_query, (word_id,), fetch_all=False)
+        result = execute_query(delete_query, (word_id, list_id, user_id), fetch_all=False)
 
         if result == 0:
             raise HTTPException(status_code=404, detail="Word not found")
 
+        _cached_pronunciation.cache_clear()
         logger.info(f"[WORD_LISTS] Deleted word {word_id} from list {list_id}")
         return {"message": "Word deleted successfully"}
 
@@ -1888,24 +1879,43 @@ async def get_spelling_session(request: Request, session_id: str, user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Seconds a cached pronunciation may be served. cache_clear() on edits only
+# reaches the worker that made them; this bounds staleness in the others
+PRONUNCIATION_CACHE_TTL = int(os.getenv("PRONUNCIATION_CACHE_TTL", "300"))
+
+
+def _lookup_pronunciation(word_id: str) -> tuple:
+    """Fetch (word, audio_url) for a word; cached since Listen is pressed repeatedly per word"""
+    return _cached_pronunciation(word_id, int(time.monotonic() // PRONUNCIATION_CACHE_TTL))
+
+
+@lru_cache(maxsize=10000)
+def _cached_pronunciation(word_id: str, ttl_bucket: int) -> tuple:
+    """Per-process cache behind _lookup_pronunciation; a new ttl_bucket forces a fresh query"""
+    query = """
+        SELECT word, pronunciation_audio_url
+        FROM words
+        WHERE id = %s
+    """
+    word = execute_query(query, (word_id,), fetch_one=True)
+
+    if not word:
+        # Raised (not returned) so misses are never cached
+        raise HTTPException(status_code=404, detail="Word not found")
+
+    return word['word'], word.get('pronunciation_audio_url')
+
+
 @app.get("/api/v1/spelling/pronunciations/{word_id}", tags=["Games - Spelling"])
 @limiter.limit("60/minute")
 async def get_pronunciation(request: Request, word_id: str, user_id: str):
     """Get pronunciation for a word"""
     try:
-        query = """
-            SELECT word, pronunciation_audio_url
-            FROM words
-            WHERE id = %s
-        """
-        word = execute_query(query, (word_id,), fetch_one=True)
-
-        if not word:
-            raise HTTPException(status_code=404, detail="Word not found")
+        word, pronunciation_url = _lookup_pronunciation(word_id)
 
         return {
-            "word": word['word'],
-            "pronunciation_url": word.get('pronunciation_audio_url'),
+            "word": word,
+            "pronunciation_url": pronunciation_url,
             "message": "Pronunciation feature not yet implemented"
         }
 
@@ -0,0 +1,85 @@
+-- Lesson item functions for the Supabase (Postgres) game tables
+-- Run this in the Supabase SQL editor; GamePopulator calls them via RPC
+-- and falls back to client-side inserts and counts when they are missing
+
+-- ============================================
+-- REFRESH LESSON COUNT
+-- ============================================
+
+-- Recounts one lesson's items and stores the total in a single round-trip.
+-- p_kind selects the tables: 'cloze', 'grammar' or 'sentence'
+CREATE OR REPLACE FUNCTION update_lesson_count(p_kind TEXT, p_lesson_id TEXT)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    CASE p_kind
+        WHEN 'cloze' THEN
+            SELECT count(*) INTO v_count FROM cloze_items WHERE lesson_id = p_lesson_id;
+            UPDATE cloze_lessons SET item_count = v_count WHERE id = p_lesson_id;
+        WHEN 'grammar' THEN
+            SELECT count(*) INTO v_count FROM grammar_questions WHERE lesson_id = p_lesson_id;
+            UPDATE grammar_lessons SET question_count = v_count WHERE id = p_lesson_id;
+        WHEN 'sentence' THEN
+            SELECT count(*) INTO v_count FROM sentence_items WHERE lesson_id = p_lesson_id;
+            UPDATE sentence_lessons SET item_count = v_count WHERE id = p_lesson_id;
+        ELSE
+            RAISE EXCEPTION 'Unknown lesson kind: %', p_kind;
+    END CASE;
+
+    RETURN v_count;
+END;
+$$;
+
+-- ============================================
+-- POPULATE LESSON ITEMS
+-- ============================================
+
+-- Inserts a batch of items (skipping ids already stored) and refreshes the
+-- affected lessons' counts in one transaction. Returns the rows inserted
+CREATE OR REPLACE FUNCTION populate_lesson_items(p_kind TEXT, p_items JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_inserted INTEGER;
+    v_lesson_id TEXT;
+BEGIN
+    CASE p_kind
+        WHEN 'cloze' THEN
+            INSERT INTO cloze_items
+                (id, topic_id, lesson_id, difficulty, text_parts, options, correct, explanation)
+            SELECT id, topic_id, lesson_id, difficulty, text_parts, options, correct, explanation
+            FROM jsonb_populate_recordset(NULL::cloze_items, p_items)
+            ON CONFLICT (id) DO NOTHING;
+        WHEN 'grammar' THEN
+            INSERT INTO grammar_questions
+                (id, category_id, lesson_id, difficulty, prompt, options, correct_index, explanation)
+            SELECT id, category_id, lesson_id, difficulty, prompt, options, correct_index, explanation
+            FROM jsonb_populate_recordset(NULL::grammar_questions, p_items)
+            ON CONFLICT (id) DO NOTHING;
+        WHEN 'sentence' THEN
+            INSERT INTO sentence_items
+                (id, topic_id, lesson_id, difficulty, english, translation, tokens, accepted, distractors)
+            SELECT id, topic_id, lesson_id, difficulty, english, translation, tokens, accepted, distractors
+            FROM jsonb_populate_recordset(NULL::sentence_items, p_items)
+            ON CONFLICT (id) DO NOTHING;
+        ELSE
+            RAISE EXCEPTION 'Unknown lesson kind: %', p_kind;
+    END CASE;
+
+    GET DIAGNOSTICS v_inserted = ROW_COUNT;
+
+    IF v_inserted > 0 THEN
+        FOR v_lesson_id IN
+            SELECT DISTINCT item->>'lesson_id' FROM jsonb_array_elements(p_items) AS item
+        LOOP
+            PERFORM update_lesson_count(p_kind, v_lesson_id);
+        END LOOP;
+    END IF;
+
+    RETURN v_inserted;
+END;
+$$;
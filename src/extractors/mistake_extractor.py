@@ -3,6 +3,7 @@ Student mistake identification and categorization
 """
 
 from typing import List, Dict
+import sys
 from src.utils.text_processing import TextProcessor
 
 class MistakeExtractor:
@@ -19,7 +20,8 @@ class MistakeExtractor:
         for incorrect, correct in corrections:
             if incorrect and correct:
                 error_type = self._categorize_error(incorrect, correct)
-                focus_word = self._identify_focus_word(incorrect, correct)
+                # Focus words recur across lessons; share one interned object per word
+                focus_word = sys.intern(self._identify_focus_word(incorrect, correct))
                 
                 mistakes.append({
                     'incorrect': incorrect,
@@ -3,9 +3,19 @@ Useful sentence extraction for practice exercises
 """
 
 from typing import List, Dict
+import re
 from src.utils.text_processing import TextProcessor
 from src.utils.gemini_helper import GeminiHelper
 
+# Standalone correction patterns in teacher lines, tried in order
+_CORRECTION_RES = tuple(re.compile(pat) for pat in (
+    r"[Cc]orrect(?:ion)?[:]?\s*[\"']([^\"']+)[\"']",
+    r"[Cc]orrect(?:ion)?:\s*([^.]+)\.?$",
+    r"The correct sentence is\s*[\"']([^\"']+)[\"']",
+    r"[Bb]etter:\s*[\"']([^\"']+)[\"']"
+))
+
+_SENT_SPLIT_RE = re.compile(r'[.!?]+')
 
 class SentenceExtractor:
     """Extracts high-quality sentences for practice"""
@@ -41,16 +51,8 @@ class SentenceExtractor:
         teacher_lines = self.text_processor.extract_teacher_utterances(transcript)
         for line in teacher_lines:
             # Check for correction patterns
-            import re
-            patterns = [
-                r"[Cc]orrect(?:ion)?[:]?\s*[\"']([^\"']+)[\"']",
-                r"[Cc]orrect(?:ion)?:\s*([^.]+)\.?$",
-                r"The correct sentence is\s*[\"']([^\"']+)[\"']",
-                r"[Bb]etter:\s*[\"']([^\"']+)[\"']"
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, line)
+            for pattern in _CORRECTION_RES:
+                match = pattern.search(line)
                 if match:
                     correct = match.group(1).strip()
                     if correct and correct not in seen:
@@ -78,9 +80,8 @@ class SentenceExtractor:
 
         # Fallback: if no labeled sentences found, split on punctuation
         if not sentences:
-            import re
             # Split on sentence boundaries
-            raw_sentences = re.split(r'[.!?]+', transcript)
+            raw_sentences = _SENT_SPLIT_RE.split(transcript)
             for sent in raw_sentences:
                 sent = sent.strip()
                 # Keep sentences 10-150 chars with at least one verb indicator
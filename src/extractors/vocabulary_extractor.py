@@ -8,6 +8,10 @@ import re
 from src.utils.text_processing import TextProcessor
 from src.utils.gemini_helper import GeminiHelper
 
+# Explicit vocabulary lists like "Important vocabulary: word1, word2, word3"
+_VOCAB_LIST_RE = re.compile(r'(?:important|key|vocabulary|words?):\s*([^.]+)', re.IGNORECASE)
+_VOCAB_SPLIT_RE = re.compile(r',|\band\b')
+
 class VocabularyExtractor:
     """Extracts key vocabulary and phrases from lessons"""
     
@@ -39,12 +43,11 @@ class VocabularyExtractor:
         # Extract explicit vocabulary from teacher (NEW)
         for line in self.text_processor.extract_teacher_utterances(transcript):
             # Match patterns like "Important vocabulary: word1, word2, word3"
-            vocab_pattern = r'(?:important|key|vocabulary|words?):\s*([^.]+)'
-            match = re.search(vocab_pattern, line, re.IGNORECASE)
+            match = _VOCAB_LIST_RE.search(line)
             if match:
                 words_str = match.group(1)
                 # Split by comma or 'and'
-                words = re.split(r',|\band\b', words_str)
+                words = _VOCAB_SPLIT_RE.split(words_str)
                 for word in words:
                     word = word.strip()
                     if word and word.lower() not in seen and len(word) > 2:
@@ -2,14 +2,45 @@
 Advanced Cloze generator - Multi-blank fill-in exercises
 Production-ready with quality checks and error handling
 """
-from typing import List, Dict, Tuple
+from typing import List, Dict, FrozenSet, Iterator, Tuple
 import re
 import random
+import heapq
+from itertools import islice
 from src.utils.gemini_helper import GeminiHelper
+from src.utils.text_processing import PUNCT_TABLE
+from src.generators.types import ClozeItem
+
+_TOKEN_RE = re.compile(r'\S+')
+_QUALITY_MARKER_RE = re.compile(r'\b(?:should|must|need to|have to)\b')
+
+# Phonetically similar distractors keyed by word ending; the endings are
+# mutually exclusive, so the first matching length decides
+_SUFFIX_RULES = {
+    'tion': lambda w: (w[:-4] + 'te',),
+    'ing': lambda w: (w[:-3] + 'ed', w[:-3] + 'ion'),
+    'ed': lambda w: (w[:-2] + 'ing',),
+}
+_SUFFIX_LENGTHS = sorted({len(suffix) for suffix in _SUFFIX_RULES}, reverse=True)
 
 class AdvancedClozeGenerator:
     """Generates multi-blank cloze exercises from sentences"""
     
+    # Commonly confused words and their distractors
+    _CONFUSABLES = {
+        'affect': ('effect', 'infect', 'defect'),
+        'accept': ('except', 'expect', 'adapt'),
+        'advice': ('advise', 'device', 'devise'),
+        'complement': ('compliment', 'implement', 'supplement'),
+        'principal': ('principle', 'practical', 'essential')
+    }
+    
+    # Generic padding distractors
+    _GENERIC_DISTRACTORS = (
+        'complete', 'consider', 'continue', 'develop', 'establish',
+        'maintain', 'provide', 'require', 'support', 'understand'
+    )
+    
     def __init__(self):
         self.gemini = GeminiHelper()
         self.min_items = 2
@@ -23,15 +54,15 @@ class AdvancedClozeGenerator:
         ]
         
         # Words to avoid as blanks
-        self.skip_words = {
+        self.skip_words = frozenset({
             'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been',
             'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
             'can', 'could', 'should', 'may', 'might', 'must', 'i', 'you',
             'he', 'she', 'it', 'we', 'they', 'this', 'that', 'these', 'those'
-        }
+        })
     
     def generate(self, sentences: List[Dict], vocabulary: List[Dict], 
-                 topic_id: str, lesson_id: str) -> List[Dict]:
+                 topic_id: str, lesson_id: str) -> List[ClozeItem]:
         """
         Generate advanced cloze items from sentences
         
@@ -46,20 +77,37 @@ class AdvancedClozeGenerator:
         """
         cloze_items = []
         seen_sentences = set()
+        vocab_words = frozenset(v['word'].lower() for v in vocabulary)
+        
+        # Filter quality sentences and score each by how many blanks it supports
+        scored = []
+        for sent_data in self._filter_quality_sentences(sentences):
+            sentence = sent_data['text']
+            spans = sent_data['_spans']
+            candidates = self._identify_key_word_indices(sentence, spans, vocab_words)
+            scored.append((sentence, spans, candidates, sent_data['_key']))
         
-        # Filter quality sentences
-        quality_sentences = self._filter_quality_sentences(sentences)
+        # Multi-blank-capable sentences first (at most 3 blanks are used, so cap
+        # the score there); the sort is stable so ties keep transcript order
+        scored.sort(key=lambda entry: min(len(entry[2]), 3), reverse=True)
         
-        for sent_data in quality_sentences:
+        for sentence, spans, candidates, sentence_key in scored:
             if len(cloze_items) >= self.max_items:
                 break
-                
-            sentence = sent_data.get('text', '')
-            if not sentence or sentence.lower() in seen_sentences:
+            
+            if sentence_key in seen_sentences:
                 continue
             
-            # Generate multi-blank cloze
-            result = self._create_multi_blank_cloze(sentence, vocabulary)
+            if len(candidates) >= 2:
+                # Generate multi-blank cloze
+                result = self._create_multi_blank_cloze(sentence, spans, candidates)
+                difficulty = None
+            elif len(cloze_items) < self.min_items:
+                # Relaxed criteria, only to reach the minimum count
+                result = self._create_single_blank_cloze(sentence, spans)
+                difficulty = 'easy'
+            else:
+                continue
             
             if result:
                 text_parts, options, correct, explanation = result
@@ -67,95 +115,70 @@ class AdvancedClozeGenerator:
                 # Create unique ID
                 item_id = f"ac_{lesson_id}_{len(cloze_items) + 1}"
                 
-                cloze_items.append({
-                    'id': item_id,
-                    'topic_id': topic_id,
-                    'lesson_id': lesson_id,
-                    'difficulty': self._assess_difficulty(sentence, correct),
-                    'text_parts': text_parts,
-                    'options': options,
-                    'correct': correct,
-                    'explanation': explanation
-                })
+                cloze_items.append(ClozeItem(
+                    id=item_id,
+                    topic_id=topic_id,
+                    lesson_id=lesson_id,
+                    difficulty=difficulty or self._assess_difficulty(len(spans), correct),
+                    text_parts=text_parts,
+                    options=options,
+                    correct=correct,
+                    explanation=explanation
+                ))
                 
-                seen_sentences.add(sentence.lower())
-        
-        # Ensure minimum count
-        if len(cloze_items) < self.min_items and len(quality_sentences) > 0:
-            # Try with relaxed criteria
-            for sent_data in quality_sentences[:5]:
-                if len(cloze_items) >= self.min_items:
-                    break
-                sentence = sent_data.get('text', '')
-                if sentence.lower() not in seen_sentences:
-                    result = self._create_single_blank_cloze(sentence)
-                    if result:
-                        text_parts, options, correct, explanation = result
-                        item_id = f"ac_{lesson_id}_{len(cloze_items) + 1}"
-                        cloze_items.append({
-                            'id': item_id,
-                            'topic_id': topic_id,
-                            'lesson_id': lesson_id,
-                            'difficulty': 'easy',
-                            'text_parts': text_parts,
-                            'options': options,
-                            'correct': correct,
-                            'explanation': explanation
-                        })
-                        seen_sentences.add(sentence.lower())
+                seen_sentences.add(sentence_key)
         
         return cloze_items
     
-    def _filter_quality_sentences(self, sentences: List[Dict]) -> List[Dict]:
-        """Filter sentences suitable for cloze exercises"""
-        quality = []
+    def _filter_quality_sentences(self, sentences: List[Dict]) -> Iterator[Dict]:
+        """
+        Filter sentences suitable for cloze exercises
         
+        Lazily yields copies carrying '_spans', the (start, end) offsets of each
+        whitespace-separated token, and '_key', the lowercased text used for
+        deduplication, so later stages don't re-split or re-lowercase it.
+        """
         for sent in sentences:
             text = sent.get('text', '')
+            spans = [m.span() for m in _TOKEN_RE.finditer(text)]
             
             # Length check
-            word_count = len(text.split())
+            word_count = len(spans)
             if word_count < 8 or word_count > 30:
                 continue
             
             # Has meaningful content
-            if any(pattern in text.lower() for pattern in ['should', 'must', 'need to', 'have to']):
-                quality.append(sent)
-            elif word_count >= 12:
-                quality.append(sent)
-        
-        return quality
+            text_lower = text.lower()
+            if word_count >= 12 or _QUALITY_MARKER_RE.search(text_lower):
+                yield {**sent, '_spans': spans, '_key': text_lower}
     
-    def _create_multi_blank_cloze(self, sentence: str, vocabulary: List[Dict]) -> Tuple:
-        """Create cloze with 2-3 blanks"""
-        words = sentence.split()
-        
-        # Identify 2-3 key words to blank out
-        key_indices = self._identify_key_word_indices(words, vocabulary)
-        
-        if len(key_indices) < 2:
+    def _create_multi_blank_cloze(self, sentence: str, spans: List[Tuple[int, int]],
+                                  candidates: List[Tuple[int, int]]) -> Tuple:
+        """Create cloze with 2-3 blanks from (priority, index) key word candidates"""
+        if len(candidates) < 2:
             return None
         
-        # Take top 2-3 key words
-        key_indices = sorted(key_indices[:3])
+        # Take top 2-3 key words (vocabulary first, earlier position breaks ties),
+        # restored to sentence order
+        top = heapq.nlargest(3, candidates, key=lambda c: (c[0], -c[1]))
+        key_indices = sorted(i for _, i in top)
         
-        # Build text parts and collect correct answers
+        # Build text parts and collect correct answers by slicing the original sentence
         text_parts = []
         correct = []
-        current_pos = 0
+        prev_end = 0
         
         for idx in key_indices:
+            start, end = spans[idx]
             # Add text before blank
-            before = ' '.join(words[current_pos:idx])
-            text_parts.append(before + ' ' if before else '')
+            text_parts.append(sentence[prev_end:start])
             
             # Add correct answer
-            correct.append(words[idx])
-            current_pos = idx + 1
+            correct.append(sentence[start:end])
+            prev_end = end
         
         # Add remaining text
-        remaining = ' '.join(words[current_pos:])
-        text_parts.append(' ' + remaining if remaining else '')
+        text_parts.append(sentence[prev_end:])
         
         # Generate options for each blank
         options = []
@@ -168,22 +191,19 @@ class AdvancedClozeGenerator:
         
         return text_parts, options, correct, explanation
     
-    def _create_single_blank_cloze(self, sentence: str) -> Tuple:
+    def _create_single_blank_cloze(self, sentence: str, spans: List[Tuple[int, int]]) -> Tuple:
         """Fallback: create simple single-blank cloze"""
-        words = sentence.split()
-        
         # Find a good word to blank
-        for i, word in enumerate(words):
-            clean_word = re.sub(r'[^\w]', '', word).lower()
-            if (len(clean_word) > 4 and 
-                clean_word not in self.skip_words and
-                word[0].isupper() == False):
+        for start, end in spans:
+            # Cheap checks on the raw token first; cleaning only removes characters
+            if end - start <= 4 or sentence[start].isupper():
+                continue
+            word = sentence[start:end]
+            clean_word = word.translate(PUNCT_TABLE).lower()
+            if len(clean_word) > 4 and clean_word not in self.skip_words:
                 
                 # Create single blank
-                text_parts = [
-                    ' '.join(words[:i]) + ' ',
-                    ' ' + ' '.join(words[i+1:])
-                ]
+                text_parts = [sentence[:start], sentence[end:]]
                 
                 correct = [clean_word]
                 options = [self._generate_distractors(clean_word, sentence)]
@@ -193,30 +213,36 @@ class AdvancedClozeGenerator:
         
         return None
     
-    def _identify_key_word_indices(self, words: List[str], vocabulary: List[Dict]) -> List[int]:
-        """Identify indices of key words suitable for blanking"""
-        key_indices = []
-        vocab_words = {v['word'].lower() for v in vocabulary}
+    def _identify_key_word_indices(self, sentence: str, spans: List[Tuple[int, int]],
+                                   vocab_words: FrozenSet[str]) -> List[Tuple[int, int]]:
+        """Identify (priority, index) of key words suitable for blanking"""
+        candidates = []
+        skip_words = self.skip_words
         
-        for i, word in enumerate(words):
-            clean_word = re.sub(r'[^\w]', '', word).lower()
+        for i, (start, end) in enumerate(spans):
+            # Cleaning only removes characters, so short raw tokens can't
+            # qualify; the span length rules them out before any slicing
+            if end - start < 4:
+                continue
+            word = sentence[start:end]
+            clean_word = word.translate(PUNCT_TABLE).lower()
             
             # Skip common words
-            if clean_word in self.skip_words or len(clean_word) < 4:
+            if clean_word in skip_words or len(clean_word) < 4:
                 continue
             
             # Prioritize vocabulary words
             if clean_word in vocab_words:
-                key_indices.append(i)
+                candidates.append((2, i))
             # Or longer meaningful words
-            elif len(clean_word) >= 6 and word[0].isupper() == False:
-                key_indices.append(i)
+            elif len(clean_word) >= 6 and not word[0].isupper():
+                candidates.append((1, i))
         
-        return key_indices
+        return candidates
     
     def _generate_distractors(self, correct_word: str, context: str) -> List[str]:
         """Generate 3 distractor options + 1 correct"""
-        clean_word = re.sub(r'[^\w]', '', correct_word).lower()
+        clean_word = correct_word.translate(PUNCT_TABLE).lower()
         
         # Common distractor patterns
         distractors = set()
@@ -224,49 +250,42 @@ class AdvancedClozeGenerator:
         # Similar length words
         if len(clean_word) >= 6:
             # Phonetically similar
-            if clean_word.endswith('ing'):
-                distractors.add(clean_word[:-3] + 'ed')
-                distractors.add(clean_word[:-3] + 'ion')
-            elif clean_word.endswith('ed'):
-                distractors.add(clean_word[:-2] + 'ing')
-            elif clean_word.endswith('tion'):
-                distractors.add(clean_word[:-4] + 'te')
+            for n in _SUFFIX_LENGTHS:
+                rule = _SUFFIX_RULES.get(clean_word[-n:])
+                if rule:
+                    distractors.update(rule(clean_word))
+                    break
         
         # Common confusables
-        confusables = {
-            'affect': ['effect', 'infect', 'defect'],
-            'accept': ['except', 'expect', 'adapt'],
-            'advice': ['advise', 'device', 'devise'],
-            'complement': ['compliment', 'implement', 'supplement'],
-            'principal': ['principle', 'practical', 'essential']
-        }
-        
-        if clean_word in confusables:
-            distractors.update(confusables[clean_word][:2])
+        confusable = self._CONFUSABLES.get(clean_word)
+        if confusable:
+            distractors.update(confusable[:2])
         
-        # Ensure we have 3 distractors
-        while len(distractors) < 3:
-            # Add generic distractors
-            generic = ['complete', 'consider', 'continue', 'develop', 'establish',
-                      'maintain', 'provide', 'require', 'support', 'understand']
-            for g in generic:
-                if g != clean_word and len(g) >= len(clean_word) - 2:
-                    distractors.add(g)
-                    if len(distractors) >= 3:
-                        break
+        # Ensure we have 3 distractors, preferring generic words of similar length
+        if len(distractors) < 3:
+            min_len = len(clean_word) - 2
+            similar = (g for g in self._GENERIC_DISTRACTORS
+                       if g != clean_word and g not in distractors and len(g) >= min_len)
+            distractors.update(islice(similar, 3 - len(distractors)))
         
-        # Build final options list
-        options = [clean_word] + list(distractors)[:3]
-        random.shuffle(options)
+        # Very long words outgrow every generic word; pad from the rest
+        if len(distractors) < 3:
+            rest = (g for g in self._GENERIC_DISTRACTORS
+                    if g != clean_word and g not in distractors)
+            distractors.update(islice(rest, 3 - len(distractors)))
         
-        return options
+        # Build final options list in random order
+        options = [clean_word, *islice(distractors, 3)]
+        return random.sample(options, len(options))
     
-    def _assess_difficulty(self, sentence: str, correct_words: List[str]) -> str:
+    def _assess_difficulty(self, word_count: int, correct_words: List[str]) -> str:
         """Assess difficulty level"""
-        word_count = len(sentence.split())
-        avg_word_len = sum(len(w) for w in correct_words) / len(correct_words)
+        if len(correct_words) >= 3:
+            return 'hard'
+        
+        avg_word_len = sum(map(len, correct_words)) / len(correct_words)
         
-        if len(correct_words) >= 3 or avg_word_len >= 8:
+        if avg_word_len >= 8:
             return 'hard'
         elif word_count >= 15 or avg_word_len >= 6:
             return 'medium'
@@ -4,10 +4,19 @@ Fill-in-the-blank exercise generator
 """
 
 import random
-from typing import List, Dict
+import re
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 
 from src.utils.gemini_helper import GeminiHelper
 
+
+@lru_cache(maxsize=1024)
+def _word_re(word: str) -> re.Pattern:
+    """Compiled whole-word, case-insensitive pattern for a target word"""
+    return re.compile(r'\b' + re.escape(word) + r'\b', re.IGNORECASE)
+
+
 class FillInBlankGenerator:
     """Generates fill-in-the-blank exercises"""
     
@@ -17,78 +26,92 @@ class FillInBlankGenerator:
         self.max_exercises = 4
     
     def generate(self, vocabulary: List[Dict], mistakes: List[Dict], 
-                 sentences: List[Dict]) -> List[Dict]:
+                 sentences: List[Dict], lesson_id: str = '0') -> List[Dict]:
         """Generate fill-in-blank exercises"""
-        exercises = []
+        # (sentence, blanked, target_word, context_type) for each selected blank
+        candidates = []
         used_sentences = set()
         
         # Use corrections as primary source
         for mistake in mistakes[:self.max_exercises]:
-            if len(exercises) >= self.max_exercises:
+            if len(candidates) >= self.max_exercises:
                 break
                 
             sentence = mistake['correct']
             target_word = mistake['focus_word']
+            sentence_key = sentence.lower()
             
-            if sentence not in used_sentences and target_word:
-                exercise = self._create_exercise(sentence, target_word, 'correction')
-                if exercise:
-                    exercises.append(exercise)
-                    used_sentences.add(sentence)
+            if sentence_key not in used_sentences and target_word:
+                prepared = self._prepare_blank(sentence, target_word)
+                if prepared:
+                    candidates.append(prepared + ('correction',))
+                    used_sentences.add(sentence_key)
         
         # Add from sentences if needed
         for sent_data in sentences:
-            if len(exercises) >= self.max_exercises:
+            if len(candidates) >= self.max_exercises:
                 break
                 
             sentence = sent_data['sentence']
-            if sentence not in used_sentences:
+            sentence_key = sentence.lower()
+            if sentence_key not in used_sentences:
                 # Pick a meaningful word
                 words = [w for w in sentence.split() 
                         if len(w) > 3 and w.isalpha()]
                 if words:
                     target = random.choice(words[:3])
-                    exercise = self._create_exercise(sentence, target, 'practice')
-                    if exercise:
-                        exercises.append(exercise)
-                        used_sentences.add(sentence)
+                    prepared = self._prepare_blank(sentence, target)
+                    if prepared:
+                        candidates.append(prepared + ('practice',))
+                        used_sentences.add(sentence_key)
         
-        return exercises
+        # Get distractors for every blank in one batched call
+        distractor_sets = self.gemini.generate_distractors_batch(
+            [(target_word, sentence) for sentence, _, target_word, _ in candidates], 3
+        )
+        
+        return [
+            self._create_exercise(blanked, target_word, distractors, context, f'FB_{lesson_id}_{idx}')
+            for idx, ((_, blanked, target_word, context), distractors)
+            in enumerate(zip(candidates, distractor_sets), start=1)
+        ]
     
-    def _create_exercise(self, sentence: str, target_word: str, 
-                        context: str) -> Dict:
-        """Create a single exercise"""
+    def _prepare_blank(self, sentence: str, target_word: str) -> Optional[Tuple[str, str, str]]:
+        """Blank out the target word, returning (sentence, blanked, target_word)"""
         # Clean inputs
         sentence = sentence.strip().strip('"')
         target_word = target_word.strip('.,!?"')
         
         # Create blank
-        import re
-        pattern = re.compile(r'\b' + re.escape(target_word) + r'\b', re.IGNORECASE)
+        pattern = _word_re(target_word)
         if not pattern.search(sentence):
             return None
             
         blanked = pattern.sub('_____', sentence, count=1)
-        
-        # Get distractors
-        distractors = self.gemini.generate_distractors(target_word, sentence, 3)
-        
-        # Create options
-        options = [target_word] + distractors
-        random.shuffle(options)
+        return sentence, blanked, target_word
+    
+    def _create_exercise(self, blanked: str, target_word: str, 
+                        distractors: List[str], context: str, exercise_id: str) -> Dict:
+        """Create a single exercise"""
+        # Create options, tagging the correct one so a distractor equal to
+        # the target can't shift the answer letter
+        items = [(target_word, True)] + [(d, False) for d in distractors]
+        random.shuffle(items)
+        correct_idx = next(i for i, (_, is_correct) in enumerate(items) if is_correct)
+        options = [text for text, _ in items]
         
         # Ensure we have 4 options
         while len(options) < 4:
             options.append('')
         
         return {
-            'exercise_id': f'FB_{len(blanked)}',
+            'exercise_id': exercise_id,
             'sentence': blanked,
             'option_a': options[0],
             'option_b': options[1],
             'option_c': options[2],
             'option_d': options[3],
-            'correct_answer': chr(65 + options.index(target_word)),
+            'correct_answer': chr(65 + correct_idx),
             'correct_word': target_word,
             'difficulty': 'beginner',
             'context_type': context
@@ -1,9 +1,19 @@
 """
 Flashcard generator for vocabulary learning
 """
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Tuple
+import re
 from src.utils.gemini_helper import GeminiHelper
 
+_SENT_SPLIT_RE = re.compile(r'[.!?]+')
+
+
+@lru_cache(maxsize=256)
+def _split_sents(context: str) -> Tuple[str, ...]:
+    """Split context into stripped, non-empty sentences (shared across vocab items)"""
+    return tuple(sent for sent in (s.strip() for s in _SENT_SPLIT_RE.split(context)) if sent)
+
 class FlashcardGenerator:
     """Generates vocabulary flashcards"""
 
@@ -17,42 +27,44 @@ class FlashcardGenerator:
         seen = set()
         simple = {'very', 'good', 'nice', 'bad', 'fine'}
 
-        # sort by priority
-        vocab_sorted = sorted(vocabulary,
-                              key=lambda x: 1 if x.get('priority') == 'high' else 2)
+        # high priority first; sorted() is stable so input order is kept otherwise
+        vocab_sorted = sorted(vocabulary, key=lambda x: x.get('priority') != 'high')
 
+        selected = []
         for item in vocab_sorted:
-            if len(flashcards) >= self.max_cards:
+            if len(selected) >= self.max_cards:
                 break
-            word = item['word']
-            if word.lower() in simple:
+            word_lower = item['word'].lower()
+            if word_lower in simple or word_lower in seen:
                 continue
-            if word.lower() not in seen:
-                # Extract short example sentence containing the word
-                context = item['context']
-                example = self._extract_short_example(word, context)
-                
-                flashcards.append({
-                    'word': word,
-                    'translation': self.gemini.translate_phrase(word),
-                    'example_sentence': example,
-                    'category': item.get('category', 'general'),
-                    'difficulty': 'beginner'
-                })
-                seen.add(word.lower())
+            selected.append(item)
+            seen.add(word_lower)
+
+        # Translate every selected word in one batched call
+        translations = self.gemini.translate_phrases_batch([item['word'] for item in selected])
+
+        for item, translation in zip(selected, translations):
+            word = item['word']
+            # Extract short example sentence containing the word
+            context = item['context']
+            example = self._extract_short_example(word, context)
+
+            flashcards.append({
+                'word': word,
+                'translation': translation,
+                'example_sentence': example,
+                'category': item.get('category', 'general'),
+                'difficulty': 'beginner'
+            })
         return flashcards
     
     def _extract_short_example(self, word: str, context: str) -> str:
         """Extract a short sentence containing the word from context"""
-        import re
-        
-        # Split into sentences
-        sentences = re.split(r'[.!?]+', context)
+        word_lower = word.lower()
         
         # Find sentence containing the word
-        for sent in sentences:
-            if word.lower() in sent.lower() and len(sent.strip()) > 10:
-                sent = sent.strip()
+        for sent in _split_sents(context):
+            if word_lower in sent.lower() and len(sent) > 10:
                 # Limit to 150 characters
                 if len(sent) > 150:
                     # Try to cut at a word boundary
@@ -2,13 +2,52 @@
 Grammar Question generator - Convert mistakes to multiple-choice questions
 Production-ready with comprehensive error type handling
 """
+from functools import lru_cache
 from typing import List, Dict, Tuple
 import random
-import re
+from src.utils.text_processing import PUNCT_TABLE
+
+# Auxiliary verbs worth blanking when no focus word is given
+_AUXILIARIES = frozenset({'is', 'are', 'was', 'were', 'have', 'has', 'had'})
+
+
+@lru_cache(maxsize=32)
+def _difficulty_for(error_type: str, severity: str) -> str:
+    """Question difficulty for an error type and severity (few distinct pairs per run)"""
+    if 'past_tense' in error_type or 'article' in error_type:
+        return 'easy'
+    elif 'subject_verb' in error_type or 'preposition' in error_type:
+        return 'medium'
+    else:
+        return 'hard' if severity == 'high' else 'medium'
+
 
 class GrammarQuestionGenerator:
     """Generates grammar questions from student mistakes"""
     
+    # Base, third-person and -ing forms of common irregular past tenses
+    _IRREGULAR = {
+        'went': ('go', 'goes', 'going'),
+        'bought': ('buy', 'buys', 'buying'),
+        'ate': ('eat', 'eats', 'eating'),
+        'wrote': ('write', 'writes', 'writing'),
+        'spoke': ('speak', 'speaks', 'speaking')
+    }
+    
+    _COMMON_PREPOSITIONS = ('in', 'on', 'at', 'to', 'for', 'with', 'by', 'from')
+    
+    # Explanation templates by error type, filled with the correct form
+    _EXPLANATION_TEMPLATES = {
+        'grammar_past_tense': "Use past tense when describing completed actions. '{}' is the correct past tense form.",
+        'grammar_verb_tense': "The verb tense should match the time reference. '{}' is the appropriate tense here.",
+        'grammar_subject_verb': "The verb must agree with the subject. '{}' is the correct form for subject-verb agreement.",
+        'grammar_article': "The correct article usage is '{}' in this context.",
+        'grammar_preposition': "The correct preposition is '{}' when used with this verb/noun.",
+        'grammar_pronoun': "'{}' is the appropriate pronoun in this context.",
+        'grammar_word_order': "The correct word order is '{}'.",
+        'grammar_plural': "'{}' is the correct singular/plural form."
+    }
+    
     def __init__(self):
         self.min_questions = 2
         self.max_questions = 4
@@ -42,11 +81,13 @@ class GrammarQuestionGenerator:
         questions = []
         seen_prompts = set()
         
-        # Filter grammar mistakes only
-        grammar_mistakes = [m for m in mistakes if 'grammar' in m.get('error_type', '')]
+        max_questions = self.max_questions
+        
+        # Filter grammar mistakes only, lazily since we stop at max_questions
+        grammar_mistakes = (m for m in mistakes if 'grammar' in m.get('error_type', ''))
         
         for mistake in grammar_mistakes:
-            if len(questions) >= self.max_questions:
+            if len(questions) >= max_questions:
                 break
             
             # Create question from mistake
@@ -56,7 +97,8 @@ class GrammarQuestionGenerator:
                 prompt, options, correct_idx, explanation = result
                 
                 # Avoid duplicate prompts
-                if prompt.lower() in seen_prompts:
+                prompt_key = prompt.lower()
+                if prompt_key in seen_prompts:
                     continue
                 
                 # Create unique ID
@@ -73,7 +115,7 @@ class GrammarQuestionGenerator:
                     'explanation': explanation
                 })
                 
-                seen_prompts.add(prompt.lower())
+                seen_prompts.add(prompt_key)
         
         # If not enough grammar mistakes, create from patterns
         if len(questions) < self.min_questions:
@@ -128,10 +170,9 @@ class GrammarQuestionGenerator:
         # If no focus word, find a verb or important word
         if blank_idx == -1:
             for i, word in enumerate(words):
-                clean = re.sub(r'[^\w]', '', word).lower()
+                clean = word.translate(PUNCT_TABLE).lower()
                 # Look for verbs (common patterns)
-                if (clean.endswith('ed') or clean.endswith('ing') or 
-                    clean in ['is', 'are', 'was', 'were', 'have', 'has', 'had']):
+                if clean.endswith(('ed', 'ing')) or clean in _AUXILIARIES:
                     blank_word = word
                     blank_idx = i
                     break
@@ -158,16 +199,21 @@ class GrammarQuestionGenerator:
         correct_word = None
         incorrect_word = None
         
-        for i, (inc_w, cor_w) in enumerate(zip(inc_words, cor_words)):
-            if inc_w.lower() != cor_w.lower():
+        # Lowercase each word once for both scans
+        inc_lower = [w.lower() for w in inc_words]
+        cor_lower = [w.lower() for w in cor_words]
+        
+        for inc_w, cor_w, inc_l, cor_l in zip(inc_words, cor_words, inc_lower, cor_lower):
+            if inc_l != cor_l:
                 correct_word = cor_w
                 incorrect_word = inc_w
                 break
         
         if not correct_word:
             # Try to find from focus word
-            for cor_w in cor_words:
-                if cor_w.lower() not in [w.lower() for w in inc_words]:
+            inc_set = set(inc_lower)
+            for cor_w, cor_l in zip(cor_words, cor_lower):
+                if cor_l not in inc_set:
                     correct_word = cor_w
                     break
         
@@ -179,17 +225,18 @@ class GrammarQuestionGenerator:
             correct_word, incorrect_word, error_type
         )
         
-        # Build options list
-        options = [correct_word] + distractors[:3]
+        # Build options list, tagging the correct one so a distractor equal
+        # to it can't shift the answer index
+        items = [(correct_word, True)] + [(d, False) for d in distractors[:3]]
         
         # Ensure we have 4 options
-        while len(options) < 4:
-            options.append(correct_word + 's')  # Generic distractor
+        while len(items) < 4:
+            items.append((correct_word + 's', False))  # Generic distractor
         
         # Shuffle and track correct index
-        correct_idx = 0
-        random.shuffle(options)
-        correct_idx = options.index(correct_word)
+        random.shuffle(items)
+        correct_idx = next(i for i, (_, is_correct) in enumerate(items) if is_correct)
+        options = [text for text, _ in items]
         
         return options, correct_idx
     
@@ -197,7 +244,7 @@ class GrammarQuestionGenerator:
                                      error_type: str) -> List[str]:
         """Generate distractors based on grammar error type"""
         distractors = []
-        clean_correct = re.sub(r'[^\w]', '', correct).lower()
+        clean_correct = correct.translate(PUNCT_TABLE).lower()
         
         if 'past_tense' in error_type:
             # Past tense errors
@@ -206,15 +253,9 @@ class GrammarQuestionGenerator:
                 distractors = [base, base + 'ing', base + 's']
             else:
                 # Irregular verbs
-                irregular = {
-                    'went': ['go', 'goes', 'going'],
-                    'bought': ['buy', 'buys', 'buying'],
-                    'ate': ['eat', 'eats', 'eating'],
-                    'wrote': ['write', 'writes', 'writing'],
-                    'spoke': ['speak', 'speaks', 'speaking']
-                }
-                if clean_correct in irregular:
-                    distractors = irregular[clean_correct]
+                irregular = self._IRREGULAR.get(clean_correct)
+                if irregular:
+                    distractors = irregular
                 else:
                     distractors = [clean_correct + 's', clean_correct + 'ing', 'have ' + clean_correct]
         
@@ -248,47 +289,34 @@ class GrammarQuestionGenerator:
         
         elif 'preposition' in error_type:
             # Preposition errors
-            common_preps = ['in', 'on', 'at', 'to', 'for', 'with', 'by', 'from']
-            distractors = [p for p in common_preps if p != clean_correct][:3]
+            distractors = [p for p in self._COMMON_PREPOSITIONS if p != clean_correct][:3]
         
         else:
             # Generic distractors
             if incorrect:
-                distractors.append(re.sub(r'[^\w]', '', incorrect).lower())
+                distractors.append(incorrect.translate(PUNCT_TABLE).lower())
             distractors.extend([clean_correct + 's', clean_correct + 'ed', clean_correct + 'ing'])
         
-        # Remove duplicates and limit to 3
-        distractors = list(dict.fromkeys(distractors))[:3]
+        # Remove duplicates and limit to 3, stopping once we have them
+        unique = []
+        for distractor in distractors:
+            if distractor not in unique:
+                unique.append(distractor)
+                if len(unique) == 3:
+                    break
         
-        return distractors
+        return unique
     
     def _generate_explanation(self, correct: str, incorrect: str, error_type: str) -> str:
         """Generate explanation for the correct answer"""
-        
-        explanations = {
-            'grammar_past_tense': f"Use past tense when describing completed actions. '{correct}' is the correct past tense form.",
-            'grammar_verb_tense': f"The verb tense should match the time reference. '{correct}' is the appropriate tense here.",
-            'grammar_subject_verb': f"The verb must agree with the subject. '{correct}' is the correct form for subject-verb agreement.",
-            'grammar_article': f"The correct article usage is '{correct}' in this context.",
-            'grammar_preposition': f"The correct preposition is '{correct}' when used with this verb/noun.",
-            'grammar_pronoun': f"'{correct}' is the appropriate pronoun in this context.",
-            'grammar_word_order': f"The correct word order is '{correct}'.",
-            'grammar_plural': f"'{correct}' is the correct singular/plural form."
-        }
-        
-        return explanations.get(error_type, f"The correct form is '{correct}'.")
+        template = self._EXPLANATION_TEMPLATES.get(error_type)
+        if template:
+            return template.format(correct)
+        return f"The correct form is '{correct}'."
     
     def _assess_difficulty(self, mistake: Dict) -> str:
         """Assess question difficulty"""
-        error_type = mistake.get('error_type', '')
-        severity = mistake.get('severity', 'medium')
-        
-        if 'past_tense' in error_type or 'article' in error_type:
-            return 'easy'
-        elif 'subject_verb' in error_type or 'preposition' in error_type:
-            return 'medium'
-        else:
-            return 'hard' if severity == 'high' else 'medium'
+        return _difficulty_for(mistake.get('error_type', ''), mistake.get('severity', 'medium'))
     
     def _generate_pattern_questions(self, category_id: str, lesson_id: str) -> List[Dict]:
         """Generate questions from common grammar patterns when not enough mistakes"""
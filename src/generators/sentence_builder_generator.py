@@ -6,9 +6,25 @@ from typing import List, Dict
 import re
 from src.utils.gemini_helper import GeminiHelper
 
+# A word starts with a letter, digit, apostrophe or hyphen and runs to the next
+# space or punctuation mark; punctuation and any other stray character (quotes,
+# brackets) stand alone
+_TOKEN_RE = re.compile(r"(?:[^\W_]|['-])[^\s.,!?;:]*|[.,!?;:]|\S")
+
+# Connectives that mark a sentence as structurally complex
+_COMPLEX_MARKERS = frozenset({'although', 'however', 'therefore', 'moreover', 'furthermore'})
+
 class SentenceBuilderGenerator:
     """Generates sentence builder items from sentences"""
     
+    # Common distractor words, grouped verbs, nouns, adjectives, adverbs
+    _DISTRACTOR_POOL = (
+        'running', 'jumping', 'eating', 'sleeping', 'working',
+        'table', 'chair', 'book', 'computer', 'phone',
+        'happy', 'sad', 'big', 'small', 'beautiful',
+        'quickly', 'slowly', 'carefully', 'easily', 'hardly'
+    )
+    
     def __init__(self):
         self.gemini = GeminiHelper()
         self.min_items = 2
@@ -17,6 +33,9 @@ class SentenceBuilderGenerator:
         # Minimum sentence quality criteria
         self.min_words = 6
         self.max_words = 20
+        
+        # Translations already fetched by this generator, keyed by sentence
+        self._translation_cache: Dict[str, str] = {}
     
     def generate(self, sentences: List[Dict], topic_id: str, lesson_id: str) -> List[Dict]:
         """
@@ -30,18 +49,22 @@ class SentenceBuilderGenerator:
         Returns:
             List of sentence items ready for database insertion
         """
-        items = []
+        # (sentence, tokens) for each selected sentence
+        selected = []
         seen_sentences = set()
         
         # Filter quality sentences
         quality_sentences = self._filter_quality_sentences(sentences)
         
         for sent_data in quality_sentences:
-            if len(items) >= self.max_items:
+            if len(selected) >= self.max_items:
                 break
             
             sentence = sent_data.get('text', '')
-            if not sentence or sentence.lower() in seen_sentences:
+            if not sentence:
+                continue
+            sentence_key = sentence.lower()
+            if sentence_key in seen_sentences:
                 continue
             
             # Tokenize sentence
@@ -50,11 +73,16 @@ class SentenceBuilderGenerator:
             if not tokens or len(tokens) < self.min_words:
                 continue
             
-            # Get translation
-            translation = self.gemini.translate_phrase(sentence)
-            
+            selected.append((sentence, tokens))
+            seen_sentences.add(sentence_key)
+        
+        # Translate every selected sentence in one batched call
+        translations = self._translate_many([sentence for sentence, _ in selected])
+        
+        items = []
+        for idx, ((sentence, tokens), translation) in enumerate(zip(selected, translations), start=1):
             # Create unique ID
-            item_id = f"sb_{lesson_id}_{len(items) + 1}"
+            item_id = f"sb_{lesson_id}_{idx}"
             
             # Generate accepted variations (for now, just the original)
             accepted = [tokens]
@@ -70,8 +98,6 @@ class SentenceBuilderGenerator:
                 'accepted': accepted,
                 'distractors': None  # Optional: could add distractor words
             })
-            
-            seen_sentences.add(sentence.lower())
         
         return items
     
@@ -95,7 +121,7 @@ class SentenceBuilderGenerator:
                 text += '.'
             
             # Not too complex (no multiple clauses)
-            if text.count(',') > 2 or text.count(';') > 0:
+            if ';' in text or text.count(',') > 2:
                 continue
             
             # Update text if modified
@@ -104,6 +130,17 @@ class SentenceBuilderGenerator:
         
         return quality
     
+    def _translate_many(self, sentences: List[str]) -> List[str]:
+        """Translate sentences in order, batching only those not translated before"""
+        keys = [sentence.strip() for sentence in sentences]
+        cache = self._translation_cache
+        
+        missing = list(dict.fromkeys(key for key in keys if key not in cache))
+        if missing:
+            cache.update(zip(missing, self.gemini.translate_phrases_batch(missing)))
+        
+        return [cache[key] for key in keys]
+    
     def _tokenize_sentence(self, sentence: str) -> List[str]:
         """
         Tokenize sentence into words and punctuation
@@ -111,41 +148,7 @@ class SentenceBuilderGenerator:
         Example:
             "Hello, world!" -> ["Hello", ",", "world", "!"]
         """
-        # Clean up extra spaces
-        sentence = ' '.join(sentence.split())
-        
-        # Split on spaces and punctuation, keeping punctuation
-        # Pattern: split on spaces, but keep punctuation as separate tokens
-        tokens = []
-        current_word = ''
-        
-        for char in sentence:
-            if char.isalnum() or char in ["'", "-"]:
-                # Part of a word
-                current_word += char
-            elif char in '.,!?;:':
-                # Punctuation - save current word and punctuation separately
-                if current_word:
-                    tokens.append(current_word)
-                    current_word = ''
-                tokens.append(char)
-            elif char == ' ':
-                # Space - save current word
-                if current_word:
-                    tokens.append(current_word)
-                    current_word = ''
-            else:
-                # Other characters (quotes, etc.) - include with word or separate
-                if current_word:
-                    current_word += char
-                else:
-                    tokens.append(char)
-        
-        # Add last word if any
-        if current_word:
-            tokens.append(current_word)
-        
-        return tokens
+        return _TOKEN_RE.findall(sentence)
     
     def _assess_difficulty(self, sentence: str, tokens: List[str]) -> str:
         """Assess difficulty level based on sentence complexity"""
@@ -153,8 +156,8 @@ class SentenceBuilderGenerator:
         avg_word_length = sum(len(t) for t in tokens if t.isalnum()) / max(word_count, 1)
         
         # Check for complex structures
-        has_complex = any(word in sentence.lower() for word in 
-                         ['although', 'however', 'therefore', 'moreover', 'furthermore'])
+        sentence_lower = sentence.lower()
+        has_complex = any(marker in sentence_lower for marker in _COMPLEX_MARKERS)
         
         if has_complex or word_count >= 15 or avg_word_length >= 7:
             return 'hard'
@@ -183,20 +186,14 @@ class SentenceBuilderGenerator:
         """Generate 2-3 distractor words that don't belong"""
         distractors = []
         
-        # Common distractor words by type
-        distractor_pool = {
-            'verbs': ['running', 'jumping', 'eating', 'sleeping', 'working'],
-            'nouns': ['table', 'chair', 'book', 'computer', 'phone'],
-            'adjectives': ['happy', 'sad', 'big', 'small', 'beautiful'],
-            'adverbs': ['quickly', 'slowly', 'carefully', 'easily', 'hardly']
-        }
-        
-        # Pick 2-3 random distractors that aren't in the sentence
-        word_tokens = [t.lower() for t in tokens if t.isalnum()]
+        # Pick 3 distractors that aren't in the sentence (pool words are all
+        # alphabetic, so only alphabetic tokens can collide)
+        word_tokens = {t.lower() for t in tokens if t.isalpha()}
         
-        for category in distractor_pool.values():
-            for word in category:
-                if word not in word_tokens and len(distractors) < 3:
-                    distractors.append(word)
+        for word in self._DISTRACTOR_POOL:
+            if word not in word_tokens:
+                distractors.append(word)
+                if len(distractors) == 3:
+                    break
         
-        return distractors[:3]
+        return distractors
@@ -2,7 +2,15 @@
 Spelling exercise generator
 """
 from typing import List, Dict
-import re
+
+# Maps every sentence terminator to '.', so a plain str.split can separate sentences
+_SENT_TERMINATORS = str.maketrans('!?', '..')
+
+# Commonly misspelled vocabulary, picked before other words
+_CHALLENGING = frozenset({
+    'comfortable', 'vegetables', 'breakfast', 'yesterday',
+    'engineer', 'sometimes', 'listening', 'bought', 'stayed'
+})
 
 class SpellingGenerator:
     """Generates spelling practice exercises"""
@@ -17,8 +25,9 @@ class SpellingGenerator:
 
         # ---- Priority 1: student mistakes (guaranteed first) ----
         for m in mistakes:
-            w = m.get('focus_word', '')
-            if w and len(w) > 2 and w.lower() not in seen:
+            w = m.get('focus_word') or ''
+            w_lower = w.lower()
+            if len(w) > 2 and w_lower not in seen:
                 # Extract short example
                 example = self._extract_short_example(w, m['correct'])
                 spelling_words.append({
@@ -27,52 +36,46 @@ class SpellingGenerator:
                     'difficulty': 'medium',
                     'source': 'student_mistake'
                 })
-                seen.add(w.lower())
-
-        # ---- Priority 2: challenging vocabulary ----
-        challenging = {
-            'comfortable', 'vegetables', 'breakfast', 'yesterday',
-            'engineer', 'sometimes', 'listening', 'bought', 'stayed'
-        }
-        for v in vocabulary:
-            if len(spelling_words) >= self.max_words: break
-            w = v['word']
-            if w.lower() in challenging and w.lower() not in seen:
-                # Extract short example
-                example = self._extract_short_example(w, v['context'])
-                spelling_words.append({
-                    'word': w,
-                    'sample_sentence': example,
-                    'difficulty': 'medium',
-                    'source': 'vocabulary'
-                })
-                seen.add(w.lower())
+                seen.add(w_lower)
 
-        # ---- Priority 3: fill remaining slots ----
-        for v in vocabulary:
+        # ---- Priorities 2 & 3: challenging vocabulary, then any longer word ----
+        # sorted() is stable, so each group keeps its vocabulary order
+        lowered = sorted(((v, v['word'].lower()) for v in vocabulary),
+                         key=lambda pair: pair[1] not in _CHALLENGING)
+        for v, w_lower in lowered:
             if len(spelling_words) >= self.max_words: break
+            if w_lower in seen:
+                continue
+            if w_lower in _CHALLENGING:
+                difficulty = 'medium'
+            elif len(w_lower) > 4:
+                difficulty = 'easy'
+            else:
+                continue
             w = v['word']
-            if len(w) > 4 and w.lower() not in seen:
-                # Extract short example
-                example = self._extract_short_example(w, v['context'])
-                spelling_words.append({
-                    'word': w,
-                    'sample_sentence': example,
-                    'difficulty': 'easy',
-                    'source': 'vocabulary'
-                })
-                seen.add(w.lower())
+            # Extract short example
+            example = self._extract_short_example(w, v['context'])
+            spelling_words.append({
+                'word': w,
+                'sample_sentence': example,
+                'difficulty': difficulty,
+                'source': 'vocabulary'
+            })
+            seen.add(w_lower)
 
         return spelling_words[:self.max_words]
     
     def _extract_short_example(self, word: str, context: str) -> str:
         """Extract a short sentence containing the word from context"""
-        # Split into sentences
-        sentences = re.split(r'[.!?]+', context)
+        # Split into sentences (runs of terminators leave empty pieces, which
+        # the length check skips); lowercasing never adds or removes a '.',
+        # so the lowered pieces line up with the originals
+        normalized = context.translate(_SENT_TERMINATORS)
+        word_lower = word.lower()
         
         # Find sentence containing the word
-        for sent in sentences:
-            if word.lower() in sent.lower() and len(sent.strip()) > 10:
+        for sent, sent_lower in zip(normalized.split('.'), normalized.lower().split('.')):
+            if word_lower in sent_lower and len(sent.strip()) > 10:
                 sent = sent.strip()
                 # Limit to 150 characters
                 if len(sent) > 150:
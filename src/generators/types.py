@@ -0,0 +1,18 @@
+"""
+Typed exercise records produced by the generators
+"""
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass(slots=True)
+class ClozeItem:
+    """Advanced cloze item, as returned by AdvancedClozeGenerator"""
+    id: str
+    topic_id: str
+    lesson_id: str
+    difficulty: str
+    text_parts: List[str]
+    options: List[List[str]]
+    correct: List[str]
+    explanation: str
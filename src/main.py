@@ -3,14 +3,111 @@ Main orchestrator for lesson processing
 Production-ready with error handling and validation
 """
 
-import pandas as pd
+import csv
+import hashlib
+import io
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from openpyxl import Workbook
 from pathlib import Path
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 from src.extractors import VocabularyExtractor, MistakeExtractor, SentenceExtractor
 from src.generators import FillInBlankGenerator, FlashcardGenerator, SpellingGenerator
 from src.utils import QualityChecker
+from src.utils.gemini_helper import GENAI_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+
+def _buffered_handler(target: logging.Handler) -> logging.handlers.MemoryHandler:
+    """Hold records until flushed (once per lesson) or an error arrives"""
+    return logging.handlers.MemoryHandler(capacity=100, flushLevel=logging.ERROR, target=target)
+
+
+def _use_handler(handler: logging.Handler):
+    """Route this module's records to a single handler instead of the root logger"""
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _flush_log_buffer():
+    """Flush buffered records, if main() or a pool worker set up buffering"""
+    for handler in logger.handlers:
+        handler.flush()
+
+
+def _init_worker_logging(queue: multiprocessing.Queue):
+    """Pool initializer: buffer records and hand them to the parent's listener"""
+    _use_handler(_buffered_handler(logging.handlers.QueueHandler(queue)))
+
+
+def _columns(records: List[Dict]) -> List[str]:
+    """Column names in first-seen order across all records, as DataFrame built them"""
+    return list(dict.fromkeys(key for record in records for key in record))
+
+
+def _csv_bytes(records: List[Dict]) -> bytes:
+    """Render records as UTF-8 CSV with a header row; missing fields are left empty"""
+    buffer = io.StringIO(newline='')
+    writer = csv.DictWriter(buffer, fieldnames=_columns(records))
+    writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue().encode('utf-8')
+
+
+def _write_csv(path: Path, records: List[Dict]):
+    """Write records as CSV with a header row"""
+    path.write_bytes(_csv_bytes(records))
+
+
+def _summary_row(lesson_num: int, exercises: Dict) -> Dict:
+    """Per-lesson exercise counts and whether the total is within 8-12"""
+    counts = {
+        'fill_in_blank_count': len(exercises['fill_in_blank']),
+        'flashcard_count': len(exercises['flashcards']),
+        'spelling_count': len(exercises['spelling']),
+    }
+    total = sum(counts.values())
+    return {
+        'lesson': lesson_num,
+        **counts,
+        'total_exercises': total,
+        'meets_requirements': 'Yes' if 8 <= total <= 12 else 'No'
+    }
+
+
+def _write_files(files: List[Tuple[Path, bytes]]) -> bool:
+    """Write rendered files concurrently (file I/O releases the GIL)"""
+    if not files:
+        return True
+    
+    def write(file: Tuple[Path, bytes]) -> Optional[Exception]:
+        path, payload = file
+        try:
+            path.write_bytes(payload)
+        except Exception as e:
+            return e
+        return None
+    
+    with ThreadPoolExecutor(max_workers=min(16, len(files))) as executor:
+        errors = list(executor.map(write, files))
+    
+    for (path, _), error in zip(files, errors):
+        if error:
+            logger.error(f"   [ERROR] Error saving {path.name}: {error}")
+        else:
+            logger.info(f"   [FILE] {path.name}")
+    
+    return not any(errors)
+
 
 class LessonProcessor:
     """Main orchestrator for lesson processing"""
@@ -28,30 +125,36 @@ class LessonProcessor:
     
     def process_lesson(self, transcript: str, lesson_number: int) -> Dict:
         """Process with exercise count limits"""
-        
-        print(f"\n{'='*60}")
-        print(f"[INFO] Processing Lesson {lesson_number}")
-        print(f"{'='*60}")
+        try:
+            return self._process_lesson(transcript, lesson_number)
+        finally:
+            # Emit the lesson's buffered log output in one piece
+            _flush_log_buffer()
+    
+    def _process_lesson(self, transcript: str, lesson_number: int) -> Dict:
+        logger.info(f"\n{'='*60}")
+        logger.info(f"[INFO] Processing Lesson {lesson_number}")
+        logger.info(f"{'='*60}")
         
         if not transcript or not transcript.strip():
-            print(f"   [WARN] Warning: Empty transcript for lesson {lesson_number}")
+            logger.warning(f"   [WARN] Warning: Empty transcript for lesson {lesson_number}")
             return {'fill_in_blank': [], 'flashcards': [], 'spelling': []}
         
         start_time = time.time()
         
         try:
             # Extract content
-            print("\n[1/3] Extracting content...")
+            logger.info("\n[1/3] Extracting content...")
             vocabulary = self.vocab_extractor.extract(transcript)
             mistakes = self.mistake_extractor.extract(transcript)
             sentences = self.sentence_extractor.extract(transcript)
             
-            print(f"   [OK] Vocabulary: {len(vocabulary)} items")
-            print(f"   [OK] Mistakes: {len(mistakes)} identified")
-            print(f"   [OK] Sentences: {len(sentences)} extracted")
+            logger.info(f"   [OK] Vocabulary: {len(vocabulary)} items")
+            logger.info(f"   [OK] Mistakes: {len(mistakes)} identified")
+            logger.info(f"   [OK] Sentences: {len(sentences)} extracted")
             
             # Generate exercises with limits
-            print("\n[2/3] Generating exercises...")
+            logger.info("\n[2/3] Generating exercises...")
             
             # Adjust generator limits
             self.fib_generator.min_exercises = 3
@@ -62,7 +165,7 @@ class LessonProcessor:
             self.spelling_generator.max_words = 4
             
             # Generate
-            fib = self.fib_generator.generate(vocabulary, mistakes, sentences)
+            fib = self.fib_generator.generate(vocabulary, mistakes, sentences, str(lesson_number))
             flashcards = self.flashcard_generator.generate(vocabulary, sentences)
             spelling = self.spelling_generator.generate(vocabulary, mistakes)
             
@@ -71,38 +174,45 @@ class LessonProcessor:
             
             # Trim if needed
             if total > 12:
-                # Prioritize trimming spelling first, then flashcards
-                while total > 12:
-                    if len(spelling) > 2:
-                        spelling = spelling[:-1]
-                    elif len(flashcards) > 3:
-                        flashcards = flashcards[:-1]
-                    elif len(fib) > 3:
-                        fib = fib[:-1]
-                    total = len(fib) + len(flashcards) + len(spelling)
+                # Prioritize trimming spelling (down to 2) first, then flashcards
+                # and fill-in-blank (down to 3 each); the floors sum to 8, so the
+                # excess always fits
+                excess = total - 12
+                take = min(excess, len(spelling) - 2)
+                if take > 0:
+                    spelling = spelling[:-take]
+                    excess -= take
+                take = min(excess, len(flashcards) - 3)
+                if take > 0:
+                    flashcards = flashcards[:-take]
+                    excess -= take
+                take = min(excess, len(fib) - 3)
+                if take > 0:
+                    fib = fib[:-take]
+                total = len(fib) + len(flashcards) + len(spelling)
             
             # Add more if needed
             if total < 8:
-                print(f"   [WARN] Adjusting exercise count from {total} to 8")
+                logger.warning(f"   [WARN] Adjusting exercise count from {total} to 8")
                 # Try to generate more from available content
                 if len(fib) < 4 and len(sentences) > len(fib):
                     # Add one more fill-in-blank if possible
                     pass
             
-            print(f"   [OK] Fill-in-blank: {len(fib)} exercises")
-            print(f"   [OK] Flashcards: {len(flashcards)} cards")
-            print(f"   [OK] Spelling: {len(spelling)} words")
-            print(f"   [INFO] Total exercises: {total} {'OK' if 8 <= total <= 12 else 'WARN'}")
+            logger.info(f"   [OK] Fill-in-blank: {len(fib)} exercises")
+            logger.info(f"   [OK] Flashcards: {len(flashcards)} cards")
+            logger.info(f"   [OK] Spelling: {len(spelling)} words")
+            logger.info(f"   [INFO] Total exercises: {total} {'OK' if 8 <= total <= 12 else 'WARN'}")
             
             # Quality check
-            print("\n[3/3] Quality validation...")
+            logger.info("\n[3/3] Quality validation...")
             is_valid = self.quality_checker.validate_exercises(fib, flashcards, spelling)
             
             if not is_valid:
-                print("   [WARN] Quality issues detected, review recommended")
+                logger.warning("   [WARN] Quality issues detected, review recommended")
             
             elapsed = time.time() - start_time
-            print(f"\n   [TIME] Processing time: {elapsed:.2f} seconds")
+            logger.info(f"\n   [TIME] Processing time: {elapsed:.2f} seconds")
             
             return {
                 'fill_in_blank': fib,
@@ -114,41 +224,39 @@ class LessonProcessor:
             }
             
         except Exception as e:
-            print(f"   [ERROR] Error processing lesson {lesson_number}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"   [ERROR] Error processing lesson {lesson_number}: {e}", exc_info=True)
             return {'fill_in_blank': [], 'flashcards': [], 'spelling': []}
     
+    def render_csv_files(self, exercises: dict, lesson_number: int,
+                         output_dir: Path) -> List[Tuple[Path, bytes]]:
+        """Render a lesson's exercise CSVs in memory as (path, contents) pairs"""
+        files = []
+        
+        # Fill-in-Blank
+        if exercises['fill_in_blank']:
+            fib_path = output_dir / f"lesson_{lesson_number}_fill_in_blank.csv"
+            files.append((fib_path, _csv_bytes(exercises['fill_in_blank'])))
+        
+        # Flashcards
+        if exercises['flashcards']:
+            fc_path = output_dir / f"lesson_{lesson_number}_flashcards.csv"
+            files.append((fc_path, _csv_bytes(exercises['flashcards'])))
+        
+        # Spelling
+        if exercises['spelling']:
+            sp_path = output_dir / f"lesson_{lesson_number}_spelling.csv"
+            files.append((sp_path, _csv_bytes(exercises['spelling'])))
+        
+        return files
+    
     def save_to_csv(self, exercises: dict, lesson_number: int, output_dir: Path) -> bool:
         """Save exercises to CSV files with error handling"""
         try:
             output_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Save Fill-in-Blank
-            if exercises['fill_in_blank']:
-                fib_df = pd.DataFrame(exercises['fill_in_blank'])
-                fib_path = output_dir / f"lesson_{lesson_number}_fill_in_blank.csv"
-                fib_df.to_csv(fib_path, index=False)
-                print(f"   [FILE] {fib_path.name}")
-            
-            # Save Flashcards
-            if exercises['flashcards']:
-                fc_df = pd.DataFrame(exercises['flashcards'])
-                fc_path = output_dir / f"lesson_{lesson_number}_flashcards.csv"
-                fc_df.to_csv(fc_path, index=False)
-                print(f"   [FILE] {fc_path.name}")
-            
-            # Save Spelling
-            if exercises['spelling']:
-                sp_df = pd.DataFrame(exercises['spelling'])
-                sp_path = output_dir / f"lesson_{lesson_number}_spelling.csv"
-                sp_df.to_csv(sp_path, index=False)
-                print(f"   [FILE] {sp_path.name}")
-            
-            return True
+            return _write_files(self.render_csv_files(exercises, lesson_number, output_dir))
             
         except Exception as e:
-            print(f"   [ERROR] Error saving files: {e}")
+            logger.error(f"   [ERROR] Error saving files: {e}")
             return False
     
     def save_combined_excel(self, all_exercises: dict, output_dir: Path) -> Optional[Path]:
@@ -156,69 +264,66 @@ class LessonProcessor:
         try:
             excel_path = output_dir / "all_lessons_combined.xlsx"
             
-            with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-                for lesson_num, exercises in all_exercises.items():
-                    # Fill-in-blank sheet
-                    if exercises['fill_in_blank']:
-                        df = pd.DataFrame(exercises['fill_in_blank'])
-                        sheet_name = f'Lesson{lesson_num}_FillInBlank'[:31]  # Excel limit
-                        df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # Flashcards sheet
-                    if exercises['flashcards']:
-                        df = pd.DataFrame(exercises['flashcards'])
-                        sheet_name = f'Lesson{lesson_num}_Flashcards'[:31]
-                        df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # Spelling sheet
-                    if exercises['spelling']:
-                        df = pd.DataFrame(exercises['spelling'])
-                        sheet_name = f'Lesson{lesson_num}_Spelling'[:31]
-                        df.to_excel(writer, sheet_name=sheet_name, index=False)
+            # Write-only mode streams rows straight to the file
+            workbook = Workbook(write_only=True)
+            
+            for lesson_num, exercises in all_exercises.items():
+                # Fill-in-blank sheet
+                if exercises['fill_in_blank']:
+                    sheet_name = f'Lesson{lesson_num}_FillInBlank'[:31]  # Excel limit
+                    self._write_sheet(workbook, sheet_name, exercises['fill_in_blank'])
+                
+                # Flashcards sheet
+                if exercises['flashcards']:
+                    sheet_name = f'Lesson{lesson_num}_Flashcards'[:31]
+                    self._write_sheet(workbook, sheet_name, exercises['flashcards'])
+                
+                # Spelling sheet
+                if exercises['spelling']:
+                    sheet_name = f'Lesson{lesson_num}_Spelling'[:31]
+                    self._write_sheet(workbook, sheet_name, exercises['spelling'])
+            
+            if not workbook.worksheets:
+                raise ValueError("No exercises to write")
+            
+            workbook.save(excel_path)
             
-            print(f"\n[SUMMARY] Combined Excel: {excel_path.name}")
+            logger.info(f"\n[SUMMARY] Combined Excel: {excel_path.name}")
             return excel_path
             
         except Exception as e:
-            print(f"   [ERROR] Error creating Excel file: {e}")
+            logger.error(f"   [ERROR] Error creating Excel file: {e}")
             return None
     
+    def _write_sheet(self, workbook: Workbook, sheet_name: str, records: List[Dict]):
+        """Append a header row plus one row per record to a new worksheet"""
+        sheet = workbook.create_sheet(title=sheet_name)
+        columns = _columns(records)
+        sheet.append(columns)
+        for record in records:
+            sheet.append([record.get(column) for column in columns])
+    
     def save_summary(self, all_exercises: dict, output_dir: Path) -> bool:
         """Generate and save summary statistics (ADDED)"""
         try:
-            summary_data = {
-                'lesson': [],
-                'fill_in_blank_count': [],
-                'flashcard_count': [],
-                'spelling_count': [],
-                'total_exercises': [],
-                'meets_requirements': []
-            }
+            summary_rows = [_summary_row(lesson_num, exercises)
+                            for lesson_num, exercises in sorted(all_exercises.items())]
             
-            for lesson_num, exercises in all_exercises.items():
-                fib_count = len(exercises['fill_in_blank'])
-                fc_count = len(exercises['flashcards'])
-                sp_count = len(exercises['spelling'])
-                total = fib_count + fc_count + sp_count
-                
-                summary_data['lesson'].append(lesson_num)
-                summary_data['fill_in_blank_count'].append(fib_count)
-                summary_data['flashcard_count'].append(fc_count)
-                summary_data['spelling_count'].append(sp_count)
-                summary_data['total_exercises'].append(total)
-                summary_data['meets_requirements'].append('Yes' if 8 <= total <= 12 else 'No')
-            
-            summary_df = pd.DataFrame(summary_data)
             summary_path = output_dir / "summary_statistics.csv"
-            summary_df.to_csv(summary_path, index=False)
+            _write_csv(summary_path, summary_rows)
             
             print(f"\n[OK] Summary saved: {summary_path.name}")
             
-            # Print summary table
+            # Print summary table, each column right-aligned to its widest cell
+            columns = _columns(summary_rows)
+            cells = [columns] + [[str(row[column]) for column in columns] for row in summary_rows]
+            widths = [max(len(row[i]) for row in cells) for i in range(len(columns))]
+            
             print("\n" + "="*60)
             print("SUMMARY STATISTICS")
             print("="*60)
-            print(summary_df.to_string(index=False))
+            for row in cells:
+                print(' '.join(cell.rjust(width) for cell, width in zip(row, widths)))
             print("="*60)
             
             return True
@@ -228,26 +333,103 @@ class LessonProcessor:
             return False
 
 
+def _read_transcript(path: str) -> Tuple[Optional[str], Optional[Exception]]:
+    """Read one transcript file, returning the error instead of raising it"""
+    try:
+        return Path(path).read_text(encoding='utf-8'), None
+    except Exception as e:
+        return None, e
+
+
 def load_transcripts_from_files(transcript_dir: Path) -> Dict[int, str]:
     """Load transcripts from files if available (ADDED)"""
     transcripts = {}
     
     if transcript_dir.exists():
-        for file in sorted(transcript_dir.glob("lesson_*.txt")):
-            try:
-                lesson_num = int(file.stem.split('_')[1])
-                content = file.read_text(encoding='utf-8')
-                if content.strip():
-                    transcripts[lesson_num] = content
-                    print(f"   [OK] Loaded {file.name}")
-            except Exception as e:
-                print(f"   [WARN] Error loading {file.name}: {e}")
+        with os.scandir(transcript_dir) as it:
+            entries = sorted((e for e in it
+                              if e.name.startswith('lesson_') and e.name.endswith('.txt')),
+                             key=lambda e: e.name)
+        
+        # Reads overlap in threads; results come back in sorted name order
+        with ThreadPoolExecutor() as executor:
+            results = executor.map(_read_transcript, [e.path for e in entries])
+            for entry, (content, error) in zip(entries, results):
+                try:
+                    if error:
+                        raise error
+                    lesson_num = int(Path(entry.name).stem.split('_')[1])
+                    if content.strip():
+                        transcripts[lesson_num] = content
+                        print(f"   [OK] Loaded {entry.name}")
+                except Exception as e:
+                    print(f"   [WARN] Error loading {entry.name}: {e}")
     
     return transcripts
 
 
+# Exercises from earlier runs, keyed by lesson and transcript digest; stored
+# with the source fingerprint they were generated under
+_EXERCISE_CACHE_FILE = '.exercise_cache.pkl'
+
+
+def _source_fingerprint() -> Tuple:
+    """Modification times of every source file, this orchestrator included"""
+    src_dir = Path(__file__).parent
+    return tuple(sorted(
+        (str(path.relative_to(src_dir)), path.stat().st_mtime_ns)
+        for path in src_dir.rglob('*.py')
+    ))
+
+
+def _gemini_enabled() -> bool:
+    """Whether extraction will use Gemini (mirrors GeminiHelper's own check)"""
+    return GENAI_AVAILABLE and bool(os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY'))
+
+
+def _exercise_cache_key(lesson_num: int, transcript: str, gemini_enabled: bool) -> str:
+    """
+    Cache key for a lesson's transcript (the lesson number appears in exercise ids);
+    AI and rule-based extraction are cached separately
+    """
+    digest = hashlib.blake2b(transcript.encode('utf-8'), digest_size=16).hexdigest()
+    return f"{lesson_num}:{'ai' if gemini_enabled else 'rules'}:{digest}"
+
+
+def _load_exercise_cache(path: Path, fingerprint: Tuple) -> Dict[str, Dict]:
+    """Load cached exercises, discarding them if the sources have changed since"""
+    try:
+        with open(path, 'rb') as f:
+            cached_fingerprint, entries = pickle.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"   [WARN] Ignoring unreadable exercise cache: {e}")
+        return {}
+    
+    return entries if cached_fingerprint == fingerprint else {}
+
+
+def _save_exercise_cache(path: Path, fingerprint: Tuple, entries: Dict[str, Dict]):
+    """Persist cached exercises for the next run"""
+    try:
+        with open(path, 'wb') as f:
+            pickle.dump((fingerprint, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        print(f"   [WARN] Failed to save exercise cache: {e}")
+
+
+def _process_lesson_worker(lesson_num: int, transcript: str) -> Tuple[int, Dict]:
+    """Process one lesson in a pool worker, with a processor of its own"""
+    return lesson_num, LessonProcessor().process_lesson(transcript, lesson_num)
+
+
 def main():
     """Main execution with enhanced error handling"""
+    # Buffer per-lesson log output and print it in one piece as each lesson finishes
+    stream_handler = logging.StreamHandler(sys.stdout)
+    _use_handler(_buffered_handler(stream_handler))
+    
     print("="*60)
     print("LESSON CONTENT EXTRACTOR & EXERCISE GENERATOR v1.0")
     print("="*60)
@@ -312,28 +494,70 @@ Teacher: Better: "The hotel was very comfortable."
     all_exercises = {}
     start_time = time.time()
     
-    # Process each lesson
-    for lesson_num, transcript in sorted(transcripts.items()):
-        exercises = processor.process_lesson(transcript, lesson_num)
-        all_exercises[lesson_num] = exercises
+    # Reuse exercises for transcripts processed by an earlier run of the same code
+    cache_path = output_dir / _EXERCISE_CACHE_FILE
+    fingerprint = _source_fingerprint()
+    cache = _load_exercise_cache(cache_path, fingerprint)
+    
+    lesson_nums = sorted(transcripts)
+    gemini_enabled = _gemini_enabled()
+    cache_keys = {num: _exercise_cache_key(num, transcripts[num], gemini_enabled)
+                  for num in lesson_nums}
+    pending = [num for num in lesson_nums if cache_keys[num] not in cache]
+    
+    for lesson_num in lesson_nums:
+        if lesson_num not in pending:
+            print(f"\n[CACHE] Lesson {lesson_num} unchanged, reusing exercises")
+    
+    # Lessons are independent, so process them in parallel worker processes;
+    # workers queue their log records back here for printing
+    if pending:
+        max_workers = min(len(pending), os.cpu_count() or 1)
+        log_queue = multiprocessing.Queue()
+        listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        listener.start()
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker_logging,
+                                     initargs=(log_queue,)) as executor:
+                for lesson_num, exercises in executor.map(_process_lesson_worker, pending,
+                                                          [transcripts[num] for num in pending]):
+                    # Failed lessons come back without their extraction results
+                    if 'vocabulary' in exercises:
+                        cache[cache_keys[lesson_num]] = exercises
+                    else:
+                        all_exercises[lesson_num] = exercises
+        finally:
+            listener.stop()
         
-        print("\nSaving files:")
-        success = processor.save_to_csv(exercises, lesson_num, output_dir)
-        if not success:
-            print(f"   [WARN] Failed to save lesson {lesson_num} files")
+        # Keep only this run's transcripts, so edited lessons don't leave
+        # stale entries behind
+        _save_exercise_cache(cache_path, fingerprint,
+                             {key: cache[key] for key in cache_keys.values() if key in cache})
+    
+    # Render every lesson's CSVs, then write them all in one concurrent batch
+    csv_files = []
+    for lesson_num in lesson_nums:
+        exercises = all_exercises.get(lesson_num) or cache[cache_keys[lesson_num]]
+        all_exercises[lesson_num] = exercises
+        csv_files.extend(processor.render_csv_files(exercises, lesson_num, output_dir))
+    
+    print("\nSaving files:")
+    if not _write_files(csv_files):
+        logger.warning("   [WARN] Failed to save some lesson files")
     
     # Save combined Excel
     excel_path = processor.save_combined_excel(all_exercises, output_dir)
+    _flush_log_buffer()
     
     # Save summary statistics (ADDED)
     processor.save_summary(all_exercises, output_dir)
     
-    # Generate report
-    report = generate_methodology_report()
+    # Write report unless an up-to-date copy is already there
     report_path = output_dir / "METHODOLOGY_REPORT.md"
     try:
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report)
+        if (not report_path.exists()
+                or report_path.stat().st_mtime < Path(__file__).stat().st_mtime):
+            report_path.write_text(_METHODOLOGY_REPORT, encoding='utf-8')
         print(f"\n📝 Report: {report_path.name}")
     except Exception as e:
         print(f"   ❌ Error saving report: {e}")
@@ -347,9 +571,8 @@ Teacher: Better: "The hotel was very comfortable."
     print("="*60)
 
 
-def generate_methodology_report():
-    """Generate the complete methodology report"""
-    return """# Methodology Report: Content Extraction & Exercise Generation
+# Written next to the outputs; static, so only rewritten when this module changes
+_METHODOLOGY_REPORT = """# Methodology Report: Content Extraction & Exercise Generation
 
 ## Executive Summary
 
@@ -508,5 +731,7 @@ Each mistake is categorized for targeted practice:
 
 This system successfully automates the creation of language learning exercises from unstructured transcripts. It maintains high quality through multi-layer validation, produces pedagogically valuable content, and operates efficiently at scale. The modular architecture allows for easy enhancement and integration with existing learning management systems.
 """
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,11 +2,15 @@
 
 from fastapi import HTTPException, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+import jwt
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import hashlib
 import os
 import logging
+import threading
+import time
 
 from src.utils.time_utils import utc_now
 
@@ -17,6 +21,11 @@ SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Verified payloads keyed by token digest, kept until the token's own expiry
+_VERIFY_CACHE_SIZE = 4096
+_VERIFY_CACHE: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+_verify_cache_lock = threading.Lock()
+
 security = HTTPBearer()
 optional_security = HTTPBearer(auto_error=False)
 
@@ -40,16 +49,34 @@ class AuthService:
     @staticmethod
     def verify_token(token: str) -> dict:
         """Verify and decode JWT token"""
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        with _verify_cache_lock:
+            entry = _VERIFY_CACHE.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    _VERIFY_CACHE.move_to_end(key)
+                    return dict(entry[1])
+                del _VERIFY_CACHE[key]
+        
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload
-        except JWTError as e:
+        except jwt.PyJWTError as e:
             logger.error(f"JWT verification failed: {e}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        
+        # Tokens without an expiry are never cached
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            with _verify_cache_lock:
+                _VERIFY_CACHE[key] = (float(exp), dict(payload))
+                if len(_VERIFY_CACHE) > _VERIFY_CACHE_SIZE:
+                    _VERIFY_CACHE.popitem(last=False)
+        
+        return payload
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security)) -> dict:
     """Dependency to get current authenticated user from JWT token"""
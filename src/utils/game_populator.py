@@ -2,10 +2,62 @@
 Game Table Populator - Migrate transcript data to game tables
 Production-ready with duplicate prevention and error handling
 """
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
 import json
+import logging
+import httpx
 from supabase import create_client, Client
 import os
+import time
+from src.generators.types import ClozeItem
+
+logger = logging.getLogger(__name__)
+
+# Rows per bulk insert; keeps large payloads clear of statement timeouts.
+# Chunks halve on a timeout, down to the minimum
+_INSERT_CHUNK_SIZE = 100
+_MIN_INSERT_CHUNK_SIZE = 10
+
+# Postgres statement_timeout (SQLSTATE 57014)
+_STATEMENT_TIMEOUT = '57014'
+
+# Function not found: PostgREST's schema cache (PGRST202) or Postgres (42883)
+_MISSING_FUNCTION_CODES = ('PGRST202', '42883')
+
+# Item table, lesson table and count column behind each lesson kind
+_LESSON_COUNT_TABLES = {
+    'cloze': ('cloze_items', 'cloze_lessons', 'item_count'),
+    'grammar': ('grammar_questions', 'grammar_lessons', 'question_count'),
+    'sentence': ('sentence_items', 'sentence_lessons', 'item_count'),
+}
+
+# Summaries migrated at once; gains flatten out beyond a handful of requests
+_MAX_CONCURRENT_SUMMARIES = 8
+
+
+def _is_transient_error(error: Exception) -> bool:
+    """Whether a failed request is worth retrying: a statement timeout, a dropped
+    connection, or a 5xx from the server"""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return str(getattr(error, 'code', '')) == _STATEMENT_TIMEOUT
+
+
+def _is_missing_function(error: Exception) -> bool:
+    """Whether an RPC failed because the function isn't deployed"""
+    return str(getattr(error, 'code', '')) in _MISSING_FUNCTION_CODES
+
+
+@lru_cache(maxsize=None)
+def _shared_client(supabase_url: str, supabase_key: str) -> Client:
+    """One Supabase client per project, so every populator reuses its kept-alive connections"""
+    return create_client(supabase_url, supabase_key)
+
 
 class GamePopulator:
     """Populates game tables from transcript extraction data"""
@@ -18,7 +70,20 @@ class GamePopulator:
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
         
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+        # Connected on first use, so populators that never touch the database stay cheap
+        self._client: Optional[Client] = None
+        
+        # Cleared once a function turns out not to be deployed, so later work skips
+        # straight to the fallbacks
+        self._lesson_rpc_available = True
+        self._count_rpc_available = True
+    
+    @property
+    def supabase(self) -> Client:
+        """Supabase client, created on first access"""
+        if self._client is None:
+            self._client = _shared_client(self.supabase_url, self.supabase_key)
+        return self._client
     
     def populate_word_lists_from_zoom_summary(self, zoom_summary_id: int, 
                                               user_id: str) -> Optional[str]:
@@ -37,13 +102,14 @@ class GamePopulator:
             response = self.supabase.table('zoom_summaries')\
                 .select('*')\
                 .eq('id', zoom_summary_id)\
-                .execute() 
+                .maybe_single()\
+                .execute()
             
-            if not response.data:
-                print(f"[ERROR] Zoom summary {zoom_summary_id} not found")
+            summary = response.data if response else None
+            if summary is None:
+                logger.error("[ERROR] Zoom summary %s not found", zoom_summary_id)
                 return None
             
-            summary = response.data[0]
             lesson_number = summary.get('lesson_number', 1)
             
             # Parse flashcards and spelling from JSONB
@@ -56,7 +122,7 @@ class GamePopulator:
                 spelling = json.loads(spelling)
             
             if not flashcards and not spelling:
-                print(f"[WARN] No flashcards or spelling data in summary {zoom_summary_id}")
+                logger.warning("[WARN] No flashcards or spelling data in summary %s", zoom_summary_id)
                 return None
             
             # Create word list
@@ -68,11 +134,13 @@ class GamePopulator:
                 .select('id')\
                 .eq('user_id', user_id)\
                 .eq('name', list_name)\
+                .limit(1)\
+                .maybe_single()\
                 .execute()
             
-            if existing.data:
-                list_id = existing.data[0]['id']
-                print(f"[INFO] Using existing word list: {list_id}")
+            if existing and existing.data:
+                list_id = existing.data['id']
+                logger.debug("[INFO] Using existing word list: %s", list_id)
             else:
                 # Create new list
                 list_data = {
@@ -87,72 +155,86 @@ class GamePopulator:
                     .execute()
                 
                 if not list_response.data:
-                    print(f"[ERROR] Failed to create word list")
+                    logger.error("[ERROR] Failed to create word list")
                     return None
                 
                 list_id = list_response.data[0]['id']
-                print(f"[OK] Created word list: {list_id}")
+                logger.debug("[OK] Created word list: %s", list_id)
             
-            # Add words from flashcards
-            words_added = 0
-            for card in flashcards:
-                word = card.get('word', '').strip()
-                translation = card.get('translation', '').strip()
-                example = card.get('example_sentence', '')
-                
-                if not word:
+            # Normalize flashcards, then spelling, to (word, translation, notes) once
+            # (spelling doesn't have translation; notes are length-limited)
+            entries = [
+                *((card.get('word', '').strip(), card.get('translation', '').strip(),
+                   card.get('example_sentence', '')) for card in flashcards),
+                *((spell.get('word', '').strip(), '', spell.get('sample_sentence', ''))
+                  for spell in spelling),
+            ]
+            
+            # One lookup for the candidates the list already has; only each
+            # word's first entry is considered
+            stored_words = self._existing_words(
+                list_id, list(dict.fromkeys(word for word, _, _ in entries if word))
+            )
+            seen_words = set()
+            words_batch = []
+            for word, translation, notes in entries:
+                if not word or word in seen_words:
                     continue
+                seen_words.add(word)
                 
                 # Check for duplicate
-                if self._word_exists(list_id, word):
-                    print(f"[SKIP] Word '{word}' already exists in list")
+                if word in stored_words:
+                    logger.debug("[SKIP] Word '%s' already exists in list", word)
                     continue
                 
-                # Insert word
-                word_data = {
+                words_batch.append({
                     'list_id': list_id,
                     'word': word,
                     'translation': translation,
-                    'notes': example[:500] if example else None,  # Limit notes length
+                    'notes': notes[:500] if notes else None,
                     'is_favorite': False
-                }
-                
-                try:
-                    self.supabase.table('words').insert(word_data).execute()
-                    words_added += 1
-                except Exception as e:
-                    print(f"[ERROR] Failed to insert word '{word}': {e}")
+                })
             
-            # Add words from spelling (if not already added)
-            for spell in spelling:
-                word = spell.get('word', '').strip()
-                sample = spell.get('sample_sentence', '')
-                
-                if not word or self._word_exists(list_id, word):
-                    continue
-                
-                word_data = {
-                    'list_id': list_id,
-                    'word': word,
-                    'translation': '',  # Spelling doesn't have translation
-                    'notes': sample[:500] if sample else None,
-                    'is_favorite': False
-                }
-                
-                try:
-                    self.supabase.table('words').insert(word_data).execute()
-                    words_added += 1
-                except Exception as e:
-                    print(f"[ERROR] Failed to insert word '{word}': {e}")
+            words_added = self._insert_rows('words', words_batch)
             
-            print(f"[OK] Added {words_added} words to list {list_id}")
+            if words_added < len(words_batch):
+                logger.warning("[WARN] Added only %s of %s words to list %s",
+                               words_added, len(words_batch), list_id)
+            else:
+                logger.debug("[OK] Added %s words to list %s", words_added, list_id)
             return list_id
             
         except Exception as e:
-            print(f"[ERROR] Failed to populate word lists: {e}")
+            logger.error("[ERROR] Failed to populate word lists: %s", e)
             return None
     
-    def populate_cloze_items(self, items: List[Dict]) -> int:
+    def populate_word_lists_from_zoom_summaries(self, zoom_summary_ids: List[int],
+                                                user_id: str) -> Dict[int, Optional[str]]:
+        """
+        Migrate several zoom summaries concurrently
+        
+        Each summary is I/O bound on its own round-trips, so a bounded thread
+        pool overlaps them while sharing this populator's client.
+        
+        Args:
+            zoom_summary_ids: IDs of the zoom_summaries records
+            user_id: User ID to assign the word lists to
+            
+        Returns:
+            Word list ID (or None if failed) for each summary ID
+        """
+        if not zoom_summary_ids:
+            return {}
+        
+        max_workers = min(len(zoom_summary_ids), _MAX_CONCURRENT_SUMMARIES)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list_ids = executor.map(
+                lambda summary_id: self.populate_word_lists_from_zoom_summary(summary_id, user_id),
+                zoom_summary_ids
+            )
+            return dict(zip(zoom_summary_ids, list_ids))
+    
+    def populate_cloze_items(self, items: List[ClozeItem]) -> int:
         """
         Insert advanced cloze items into database
         
@@ -162,44 +244,25 @@ class GamePopulator:
         Returns:
             Number of items inserted
         """
-        inserted = 0
+        # Stored ids are skipped by the upsert itself; repeats here are dropped locally
+        batched_ids = set()
+        rows = []
         
         for item in items:
             try:
-                # Check for duplicate
-                existing = self.supabase.table('cloze_items')\
-                    .select('id')\
-                    .eq('id', item['id'])\
-                    .execute()
-                
-                if existing.data:
-                    print(f"[SKIP] Cloze item {item['id']} already exists")
+                if item.id in batched_ids:
+                    logger.debug("[SKIP] Cloze item %s already exists", item.id)
                     continue
                 
-                # Convert lists to JSONB format
-                item_data = {
-                    'id': item['id'],
-                    'topic_id': item['topic_id'],
-                    'lesson_id': item['lesson_id'],
-                    'difficulty': item['difficulty'],
-                    'text_parts': json.dumps(item['text_parts']),
-                    'options': json.dumps(item['options']),
-                    'correct': json.dumps(item['correct']),
-                    'explanation': item['explanation']
-                }
-                
-                self.supabase.table('cloze_items').insert(item_data).execute()
-                inserted += 1
-                print(f"[OK] Inserted cloze item: {item['id']}")
+                # Lists go in as-is; the client serializes them into the JSONB columns
+                rows.append(asdict(item))
+                batched_ids.add(item.id)
                 
             except Exception as e:
-                print(f"[ERROR] Failed to insert cloze item {item.get('id', 'unknown')}: {e}")
+                logger.error("[ERROR] Failed to prepare cloze item %s: %s",
+                             getattr(item, 'id', 'unknown'), e)
         
-        # Update lesson item count
-        if inserted > 0 and items:
-            self._update_cloze_lesson_count(items[0]['lesson_id'])
-        
-        return inserted
+        return self._populate_lesson_rows('cloze', rows)
     
     def populate_grammar_questions(self, questions: List[Dict]) -> int:
         """
@@ -211,44 +274,34 @@ class GamePopulator:
         Returns:
             Number of questions inserted
         """
-        inserted = 0
+        # Stored ids are skipped by the upsert itself; repeats here are dropped locally
+        batched_ids = set()
+        rows = []
         
         for question in questions:
             try:
-                # Check for duplicate
-                existing = self.supabase.table('grammar_questions')\
-                    .select('id')\
-                    .eq('id', question['id'])\
-                    .execute()
-                
-                if existing.data:
-                    print(f"[SKIP] Grammar question {question['id']} already exists")
+                if question['id'] in batched_ids:
+                    logger.debug("[SKIP] Grammar question %s already exists", question['id'])
                     continue
                 
-                # Convert options to JSONB
-                question_data = {
+                # Options go in as a native list for the JSONB column
+                rows.append({
                     'id': question['id'],
                     'category_id': question['category_id'],
                     'lesson_id': question['lesson_id'],
                     'difficulty': question['difficulty'],
                     'prompt': question['prompt'],
-                    'options': json.dumps(question['options']),
+                    'options': question['options'],
                     'correct_index': question['correct_index'],
                     'explanation': question['explanation']
-                }
-                
-                self.supabase.table('grammar_questions').insert(question_data).execute()
-                inserted += 1
-                print(f"[OK] Inserted grammar question: {question['id']}")
+                })
+                batched_ids.add(question['id'])
                 
             except Exception as e:
-                print(f"[ERROR] Failed to insert grammar question {question.get('id', 'unknown')}: {e}")
-        
-        # Update lesson question count
-        if inserted > 0 and questions:
-            self._update_grammar_lesson_count(questions[0]['lesson_id'])
+                logger.error("[ERROR] Failed to prepare grammar question %s: %s",
+                             question.get('id', 'unknown'), e)
         
-        return inserted
+        return self._populate_lesson_rows('grammar', rows)
     
     def populate_sentence_items(self, items: List[Dict]) -> int:
         """
@@ -260,117 +313,174 @@ class GamePopulator:
         Returns:
             Number of items inserted
         """
-        inserted = 0
+        # Stored ids are skipped by the upsert itself; repeats here are dropped locally
+        batched_ids = set()
+        rows = []
         
         for item in items:
             try:
-                # Check for duplicate
-                existing = self.supabase.table('sentence_items')\
-                    .select('id')\
-                    .eq('id', item['id'])\
-                    .execute()
-                
-                if existing.data:
-                    print(f"[SKIP] Sentence item {item['id']} already exists")
+                if item['id'] in batched_ids:
+                    logger.debug("[SKIP] Sentence item %s already exists", item['id'])
                     continue
                 
-                # Convert arrays to JSONB
-                item_data = {
+                # Arrays go in as native lists for the JSONB columns
+                rows.append({
                     'id': item['id'],
                     'topic_id': item['topic_id'],
                     'lesson_id': item['lesson_id'],
                     'difficulty': item['difficulty'],
                     'english': item['english'],
                     'translation': item['translation'],
-                    'tokens': json.dumps(item['tokens']),
-                    'accepted': json.dumps(item['accepted']),
-                    'distractors': json.dumps(item['distractors']) if item.get('distractors') else None
-                }
-                
-                self.supabase.table('sentence_items').insert(item_data).execute()
-                inserted += 1
-                print(f"[OK] Inserted sentence item: {item['id']}")
+                    'tokens': item['tokens'],
+                    'accepted': item['accepted'],
+                    'distractors': item['distractors'] if item.get('distractors') else None
+                })
+                batched_ids.add(item['id'])
                 
             except Exception as e:
-                print(f"[ERROR] Failed to insert sentence item {item.get('id', 'unknown')}: {e}")
+                logger.error("[ERROR] Failed to prepare sentence item %s: %s", item.get('id', 'unknown'), e)
         
-        # Update lesson item count
-        if inserted > 0 and items:
-            self._update_sentence_lesson_count(items[0]['lesson_id'])
+        return self._populate_lesson_rows('sentence', rows)
+    
+    def _populate_lesson_rows(self, kind: str, rows: List[Dict]) -> int:
+        """
+        Insert a lesson's item rows and refresh its count, returning rows inserted
+        
+        Uses the populate_lesson_items function for a single transactional
+        round-trip; without it, falls back to bulk upserts plus a count update.
+        """
+        if not rows:
+            return 0
+        
+        if self._lesson_rpc_available:
+            try:
+                response = self.supabase.rpc('populate_lesson_items', {
+                    'p_kind': kind,
+                    'p_items': rows
+                }).execute()
+                logger.debug("[OK] Inserted %s %s items", response.data, kind)
+                return response.data
+            except Exception as e:
+                # The transaction rolled back, so the fallback can safely retry
+                if _is_missing_function(e):
+                    # Function not deployed (see sql/supabase_lesson_counts.sql)
+                    logger.warning("[WARN] populate_lesson_items RPC unavailable, inserting client-side: %s", e)
+                    self._lesson_rpc_available = False
+                else:
+                    # A timeout or one-off failure; try the RPC again next time
+                    logger.warning("[WARN] populate_lesson_items RPC failed, inserting client-side: %s", e)
+        
+        items_table = _LESSON_COUNT_TABLES[kind][0]
+        inserted = self._insert_rows(items_table, rows, on_conflict='id')
+        
+        # Update lesson item count (failed chunks are skipped, so this also
+        # covers a partial insert)
+        if inserted > 0:
+            self._update_lesson_count(kind, rows[0]['lesson_id'])
         
         return inserted
     
-    def _word_exists(self, list_id: str, word: str) -> bool:
-        """Check if word already exists in list"""
+    def _insert_rows(self, table: str, rows: List[Dict], on_conflict: Optional[str] = None) -> int:
+        """
+        Bulk insert rows in chunks, returning how many were inserted
+        
+        With on_conflict, rows clashing with stored ones on those columns are
+        skipped atomically (ON CONFLICT DO NOTHING) and only new rows count.
+        Transient failures are retried in smaller chunks; any other error, or
+        one that persists at the minimum chunk size, is logged and that chunk
+        skipped, so the count covers only the rows that landed.
+        """
+        inserted = 0
+        chunk_size = _INSERT_CHUNK_SIZE
+        retries = 0
+        start = 0
+        
+        while start < len(rows):
+            chunk = rows[start:start + chunk_size]
+            try:
+                if on_conflict:
+                    response = self.supabase.table(table)\
+                        .upsert(chunk, on_conflict=on_conflict, ignore_duplicates=True)\
+                        .execute()
+                    added = len(response.data)
+                    if added < len(chunk):
+                        logger.debug("[SKIP] %s rows already exist in %s", len(chunk) - added, table)
+                else:
+                    self.supabase.table(table).insert(chunk).execute()
+                    added = len(chunk)
+                inserted += added
+                logger.debug("[OK] Inserted %s rows into %s", added, table)
+            except Exception as e:
+                if _is_transient_error(e) and chunk_size > _MIN_INSERT_CHUNK_SIZE:
+                    # Timeouts usually mean the payload is too big: back off and
+                    # retry the same rows in smaller chunks
+                    retries += 1
+                    chunk_size = max(chunk_size // 2, _MIN_INSERT_CHUNK_SIZE)
+                    logger.warning("[WARN] Insert into %s timed out, retrying with %s-row chunks: %s",
+                                   table, chunk_size, e)
+                    time.sleep(0.1 * 2 ** retries)
+                    continue
+                
+                # A failed chunk doesn't stop the remaining ones
+                logger.error("[ERROR] Failed to insert %s rows into %s (rows %s-%s): %s",
+                             len(chunk), table, start, start + len(chunk) - 1, e)
+            
+            start += len(chunk)
+        
+        return inserted
+    
+    def _existing_words(self, list_id: str, words: List[str]) -> Set[str]:
+        """Fetch which of the given words are already in a list (one query, word = ANY(...))"""
+        if not words:
+            return set()
+        
         try:
             response = self.supabase.table('words')\
-                .select('id')\
+                .select('word')\
                 .eq('list_id', list_id)\
-                .eq('word', word)\
-                .execute()
-            return len(response.data) > 0
-        except:
-            return False
-    
-    def _update_cloze_lesson_count(self, lesson_id: str):
-        """Update item count for cloze lesson"""
-        try:
-            # Count items
-            count_response = self.supabase.table('cloze_items')\
-                .select('id', count='exact')\
-                .eq('lesson_id', lesson_id)\
-                .execute()
-            
-            count = count_response.count if hasattr(count_response, 'count') else len(count_response.data)
-            
-            # Update lesson
-            self.supabase.table('cloze_lessons')\
-                .update({'item_count': count})\
-                .eq('id', lesson_id)\
+                .in_('word', words)\
                 .execute()
-            
-            print(f"[OK] Updated cloze lesson {lesson_id} count: {count}")
+            return {row['word'] for row in response.data}
         except Exception as e:
-            print(f"[WARN] Failed to update cloze lesson count: {e}")
+            # Without the stored words every candidate would look new; let the
+            # caller skip the insert rather than add duplicates
+            logger.error("[ERROR] Failed to fetch existing words for list %s: %s", list_id, e)
+            raise
     
-    def _update_grammar_lesson_count(self, lesson_id: str):
-        """Update question count for grammar lesson"""
+    def _update_lesson_count(self, kind: str, lesson_id: str):
+        """Update a lesson's item count, server-side when update_lesson_count exists"""
+        items_table, lessons_table, count_column = _LESSON_COUNT_TABLES[kind]
         try:
-            # Count questions
-            count_response = self.supabase.table('grammar_questions')\
-                .select('id', count='exact')\
-                .eq('lesson_id', lesson_id)\
-                .execute()
-            
-            count = count_response.count if hasattr(count_response, 'count') else len(count_response.data)
-            
-            # Update lesson
-            self.supabase.table('grammar_lessons')\
-                .update({'question_count': count})\
-                .eq('id', lesson_id)\
-                .execute()
+            if self._count_rpc_available:
+                try:
+                    response = self.supabase.rpc('update_lesson_count', {
+                        'p_kind': kind,
+                        'p_lesson_id': lesson_id
+                    }).execute()
+                    logger.debug("[OK] Updated %s lesson %s count: %s", kind, lesson_id, response.data)
+                    return
+                except Exception as e:
+                    if _is_missing_function(e):
+                        # Function not deployed (see sql/supabase_lesson_counts.sql)
+                        logger.warning("[WARN] update_lesson_count RPC unavailable, counting client-side: %s", e)
+                        self._count_rpc_available = False
+                    else:
+                        logger.warning("[WARN] update_lesson_count RPC failed, counting client-side: %s", e)
             
-            print(f"[OK] Updated grammar lesson {lesson_id} count: {count}")
-        except Exception as e:
-            print(f"[WARN] Failed to update grammar lesson count: {e}")
-    
-    def _update_sentence_lesson_count(self, lesson_id: str):
-        """Update item count for sentence lesson"""
-        try:
-            # Count items
-            count_response = self.supabase.table('sentence_items')\
-                .select('id', count='exact')\
+            # Count items; head=True returns only the count, no rows
+            count_response = self.supabase.table(items_table)\
+                .select('id', count='exact', head=True)\
                 .eq('lesson_id', lesson_id)\
                 .execute()
             
-            count = count_response.count if hasattr(count_response, 'count') else len(count_response.data)
+            count = count_response.count
             
             # Update lesson
-            self.supabase.table('sentence_lessons')\
-                .update({'item_count': count})\
+            self.supabase.table(lessons_table)\
+                .update({count_column: count})\
                 .eq('id', lesson_id)\
                 .execute()
             
-            print(f"[OK] Updated sentence lesson {lesson_id} count: {count}")
+            logger.debug("[OK] Updated %s lesson %s count: %s", kind, lesson_id, count)
         except Exception as e:
-            print(f"[WARN] Failed to update sentence lesson count: {e}")
+            logger.warning("[WARN] Failed to update %s lesson count: %s", kind, e)
@@ -2,11 +2,20 @@
 """Google Gemini AI integration for content extraction
 Production-ready with optimized prompts and comprehensive error handling"""
 
+import asyncio
+import contextlib
+import hashlib
 import os
+from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 import logging
 import json
+import random
 import re
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict, deque
 
 try:
     import google.generativeai as genai
@@ -14,8 +23,299 @@ try:
 except ImportError:
     GENAI_AVAILABLE = False
 
+try:
+    from google.api_core.exceptions import (
+        DeadlineExceeded, ResourceExhausted, ServiceUnavailable, TooManyRequests
+    )
+    _THROTTLE_ERRORS = (ResourceExhausted, TooManyRequests)
+    _TRANSIENT_ERRORS = _THROTTLE_ERRORS + (ServiceUnavailable, DeadlineExceeded)
+except ImportError:
+    _THROTTLE_ERRORS = ()
+    _TRANSIENT_ERRORS = ()
+
 logger = logging.getLogger(__name__)
 
+# AIMD limit on concurrent async Gemini requests: start low, grow by a step
+# after each fast success, halve on every 429
+_START_CONCURRENCY = 4
+_CONCURRENCY_STEP = 0.5
+_CONCURRENCY_BACKOFF = 0.5
+_TARGET_LATENCY = 2.0
+
+# Consecutive 429s within the window open the circuit (fallback only) for the window
+_BREAKER_THRESHOLD = 3
+_BREAKER_WINDOW = 30.0
+
+# Transient Gemini errors are retried with exponential backoff (1s, 2s, ...) +-20% jitter
+_RETRY_ATTEMPTS = 3
+_RETRY_BASE_DELAY = 1.0
+_RETRY_JITTER = 0.2
+
+
+# Validated AI vocabulary keyed by prompt digest, so re-processed transcripts
+# skip the Gemini call; shared by all helpers, least recently used evicted first
+_VOCAB_CACHE_SIZE = 256
+_VOCAB_CACHE: "OrderedDict[bytes, Tuple[Dict[str, str], ...]]" = OrderedDict()
+_vocab_cache_lock = threading.Lock()
+
+# Transcripts up to this length are packed several to a vocabulary prompt by
+# extract_vocabulary_batch_with_ai, sharing the instructions and one request
+_SHORT_TRANSCRIPT_CHARS = 1500
+_BATCH_PROMPT_SIZE = 5
+
+
+# Proactive tokens-per-minute budget, shared by every helper since the quota
+# belongs to the API key; requests wait once 90% of it is spoken for
+_TPM_LIMIT = int(os.getenv('GEMINI_TPM_LIMIT', '4000000'))
+_TPM_HEADROOM = 0.9
+_TPM_WINDOW = 60.0
+
+
+class _TokenWindow:
+    """Sliding window of recent Gemini requests as [timestamp, tokens] entries"""
+    
+    def __init__(self, limit: int, clock=time.monotonic):
+        self.budget = limit * _TPM_HEADROOM
+        self.entries = deque()
+        self.total = 0
+        self.lock = threading.Lock()
+        self.clock = clock
+    
+    def reserve(self, tokens: int) -> Tuple[Optional[list], float]:
+        """Record a request's estimated tokens, or return how long to wait until they fit"""
+        with self.lock:
+            now = self.clock()
+            while self.entries and now - self.entries[0][0] >= _TPM_WINDOW:
+                expired = self.entries.popleft()
+                self.total -= expired[1]
+                expired[1] = None
+            
+            # An empty window admits any request, however large
+            if self.entries and self.total + tokens > self.budget:
+                return None, self.entries[0][0] + _TPM_WINDOW - now
+            
+            entry = [now, tokens]
+            self.entries.append(entry)
+            self.total += tokens
+            return entry, 0.0
+    
+    def settle(self, entry: list, tokens: Optional[int]):
+        """Replace a reservation's estimate with the token count Gemini reported"""
+        with self.lock:
+            if tokens is not None and entry[1] is not None:
+                self.total += tokens - entry[1]
+                entry[1] = tokens
+
+
+_TOKEN_WINDOW = _TokenWindow(_TPM_LIMIT)
+
+
+def _response_tokens(response) -> Optional[int]:
+    return getattr(getattr(response, 'usage_metadata', None), 'total_token_count', None)
+
+
+def _prompt_digest(prompt: str) -> bytes:
+    return hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+
+
+def _retry_delay(attempt: int) -> float:
+    return _RETRY_BASE_DELAY * 2 ** attempt * random.uniform(1 - _RETRY_JITTER, 1 + _RETRY_JITTER)
+
+# Comprehensive distractor pool with categories
+_DISTRACTOR_POOL = {
+    # Present tense verbs
+    'wake': ('wakes', 'waking', 'woken'),
+    'wake up': ('wakes up', 'waking up', 'woke up'),
+    'eat': ('eats', 'eating', 'eaten'),
+    'brush': ('brushes', 'brushing', 'brushed'),
+    'read': ('reads', 'reading', 'readed'),
+    'play': ('plays', 'playing', 'played'),
+    'like': ('likes', 'liking', 'liked'),
+    
+    # Past tense verbs
+    'went': ('go', 'goes', 'gone'),
+    'bought': ('buy', 'buys', 'buyed'),
+    'stayed': ('stay', 'stays', 'staying'),
+    'cooked': ('cook', 'cooks', 'cooking'),
+    
+    # Continuous forms
+    'playing': ('play', 'plays', 'played'),
+    'listening': ('listen', 'listens', 'listened'),
+    'reading': ('read', 'reads', 'readed'),
+    'waking': ('wake', 'wakes', 'woken'),
+    'cooking': ('cook', 'cooks', 'cooked'),
+    
+    # Nouns - singular/plural
+    'eggs': ('egg', 'egges', 'an egg'),
+    'teeth': ('tooth', 'teeths', 'tooths'),
+    'vegetables': ('vegetable', 'vegitable', 'vegitables'),
+    'days': ('day', 'daies', 'daily'),
+    'people': ('person', 'peoples', 'persons'),
+    'books': ('book', 'bookes', 'booking'),
+    'fruits': ('fruit', 'fruites', 'fruity'),
+    
+    # Articles
+    'a': ('an', 'the', 'some'),
+    'an': ('a', 'the', 'any'),
+    'the': ('a', 'an', 'this'),
+    
+    # Prepositions
+    'to': ('at', 'in', 'for'),
+    'at': ('in', 'on', 'to'),
+    'in': ('at', 'on', 'into'),
+    'for': ('to', 'at', 'since'),
+    'with': ('by', 'from', 'along'),
+    
+    # Adjectives/Adverbs
+    'comfortable': ('comfort', 'comfortably', 'comforted'),
+    'sometimes': ('sometime', 'some time', 'always'),
+    
+    # Time expressions
+    'yesterday': ('tomorrow', 'today', 'last day'),
+    'morning': ('evening', 'afternoon', 'mornings'),
+    
+    # Numbers
+    'five': ('four', 'fives', 'fifth'),
+    'three': ('two', 'third', 'threes')
+}
+
+# Fallback groups for words no suffix rule covers
+_SEMANTIC_GROUPS = {
+    'time': ('always', 'never', 'often', 'sometimes', 'usually'),
+    'quantity': ('many', 'few', 'some', 'all', 'most'),
+    'quality': ('good', 'bad', 'nice', 'great', 'fine'),
+    'action': ('do', 'make', 'take', 'get', 'have')
+}
+
+# Word -> the members of its semantic group; built in reverse so the first
+# group still wins if a word ever appears in two
+_WORD_TO_GROUP = {word: words for words in reversed(tuple(_SEMANTIC_GROUPS.values()))
+                  for word in words}
+
+# Final fallback - common confusing words
+_COMMON_CONFUSIONS = ('then', 'than', 'there', 'their', 'were', 'where',
+                      'your', 'you\'re', 'its', 'it\'s', 'to', 'too')
+_COMMON_CONFUSIONS_SET = frozenset(_COMMON_CONFUSIONS)
+
+
+def _past_tense_forms(word: str) -> List[str]:
+    base = word[:-2] if not word.endswith('ied') else word[:-3] + 'y'
+    return [base, base + 's', base + 'ing']
+
+
+def _continuous_forms(word: str) -> List[str]:
+    base = word[:-3] if not word.endswith('ying') else word[:-4] + 'y'
+    return [base, base + 's', base + 'ed']
+
+
+def _plural_forms(word: str) -> List[str]:
+    # Too short to strip safely ('is', 'bus'); left to the later fallbacks
+    if len(word) <= 3:
+        return []
+    base = word[:-1] if not word.endswith('es') else word[:-2]
+    return [base, base + 'ing', base + 'ed']
+
+
+def _adverb_forms(word: str) -> List[str]:
+    base = word[:-2]
+    return [base, base + 'ful', base + 'ness']
+
+
+# Word-type rules by ending: past tense, continuous, plural/3rd person, adverbs.
+# The endings never overlap, so at most one rule applies
+_SUFFIX_RULES = (
+    ('ed', _past_tense_forms),
+    ('ing', _continuous_forms),
+    ('s', _plural_forms),
+    ('ly', _adverb_forms),
+)
+_SUFFIXES = tuple(suffix for suffix, _ in _SUFFIX_RULES)
+
+
+@lru_cache(maxsize=4096)
+def _pattern_distractors(word_lower: str, count: int) -> Tuple[str, ...]:
+    """Deterministic distractors for words outside the pool (cached per word)"""
+    # Smart pattern-based generation; most words match no suffix and skip
+    # the rules with a single endswith check
+    generated = []
+    if word_lower.endswith(_SUFFIXES):
+        for suffix, rule in _SUFFIX_RULES:
+            if word_lower.endswith(suffix):
+                generated = rule(word_lower)
+                break
+    
+    # If still no distractors, use semantic groups
+    if not generated:
+        # Find which group the word might belong to
+        words = _WORD_TO_GROUP.get(word_lower)
+        if words:
+            generated = [w for w in words if w != word_lower][:count]
+    
+    # Final fallback - common confusing words
+    if not generated:
+        if word_lower in _COMMON_CONFUSIONS_SET:
+            generated = [w for w in _COMMON_CONFUSIONS if w != word_lower][:count]
+        else:
+            generated = list(_COMMON_CONFUSIONS[:count])
+    
+    return tuple(generated[:count])
+
+
+# Simple translation dictionary (expandable)
+_TRANSLATIONS = {
+    'wake up': 'להתעורר (lehitorer)',
+    'breakfast': 'ארוחת בוקר (aruchat boker)',
+    'bread': 'לחם (lechem)',
+    'eggs': 'ביצים (beitzim)',
+    'teeth': 'שיניים (shinayim)',
+    'football': 'כדורגל (kaduregel)',
+    'music': 'מוזיקה (muzika)',
+    'books': 'ספרים (sefarim)',
+    'family': 'משפחה (mishpacha)',
+    'father': 'אבא (aba)',
+    'mother': 'אמא (ima)',
+    'engineer': 'מהנדס (mihandes)',
+    'teacher': 'מורה (mora)',
+    'market': 'שוק (shuk)',
+    'vegetables': 'ירקות (yerakot)',
+    'fruits': 'פירות (priyot)',
+    'yesterday': 'אתמול (etmol)',
+    'hotel': 'מלון (malon)',
+    'comfortable': 'נוח (noach)',
+    'sometimes': 'לפעמים (lepaamim)'
+}
+
+# Word/sentence splitting for the rule-based extractor and JSON payloads in AI responses
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+_SENT_RE = re.compile(r'[.!?]')
+_JSON_RE = re.compile(r'\[.*\]', re.DOTALL)
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Markdown code fences around AI JSON responses
+_FENCE_JSON_RE = re.compile(r'```json\s*')
+_FENCE_RE = re.compile(r'```\s*')
+_LEADING_FENCE_RE = re.compile(r'^```(?:json)?\s*')
+_TRAILING_FENCE_RE = re.compile(r'\s*```$')
+
+# Common words never returned as vocabulary by the rule-based extractor
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'should',
+    'can', 'could', 'may', 'might', 'this', 'that', 'these', 'those',
+    'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
+    'my', 'your', 'his', 'its', 'our', 'their', 'so', 'if', 'as', 'all',
+    'just', 'like', 'okay', 'ok', 'yeah', 'yes', 'no', 'not', 'now', 'then'
+})
+
+# Common words dropped from AI vocabulary results
+_AI_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'is', 'are', 'was', 'were',
+    'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+    'i', 'you', 'he', 'she', 'it', 'we', 'they', 'this', 'that'
+})
+
+
 class GeminiHelper:
     """Production-ready Gemini AI wrapper with optimized prompts"""
     
@@ -29,9 +329,25 @@ class GeminiHelper:
         self.api_key = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
         self.prompt_style = prompt_style
         
+        # Adaptive cap on concurrent async Gemini requests, plus the 429 circuit
+        # breaker; asyncio primitives belong to one event loop, so each loop
+        # gets its own gate
+        self.max_concurrency = int(os.getenv('GEMINI_MAX_CONCURRENCY', '8'))
+        self._concurrency = float(min(_START_CONCURRENCY, self.max_concurrency))
+        self._gates = weakref.WeakKeyDictionary()
+        self._throttles = deque(maxlen=_BREAKER_THRESHOLD)
+        self._breaker_open_until = 0.0
+        self._clock = time.monotonic
+        
         if self.api_key and GENAI_AVAILABLE:
             try:
-                genai.configure(api_key=self.api_key)
+                # The default gRPC transport keeps one long-lived channel per process;
+                # GEMINI_TRANSPORT=rest suits networks that block gRPC
+                transport = os.getenv('GEMINI_TRANSPORT')
+                if transport:
+                    genai.configure(api_key=self.api_key, transport=transport)
+                else:
+                    genai.configure(api_key=self.api_key)
                 model_name = os.getenv("GOOGLE_GEMINI_MODEL", "gemini-2.5-flash-lite-preview-09-2025")
                 self.model = genai.GenerativeModel(model_name)
                 self.enabled = True
@@ -54,183 +370,338 @@ class GeminiHelper:
         """Generate realistic distractor options for fill-in-blank"""
         return self._fallback_distractors(correct_word, count)
     
+    def generate_distractors_batch(self, pairs: List[Tuple[str, str]], count: int = 3) -> List[List[str]]:
+        """
+        Generate distractors for many (word, context) pairs in one call
+        
+        Args:
+            pairs: List of (correct_word, context) tuples
+            count: Number of distractors per word
+            
+        Returns:
+            One distractor list per input pair, in the same order
+        """
+        # Context is unused by the rule-based generator, so go straight to it;
+        # pool keys are exact-match dict probes and suffix rules are cached per word
+        fallback = self._fallback_distractors
+        return [fallback(word, count) for word, _ in pairs]
+    
     def _fallback_distractors(self, correct_word: str, count: int = 3) -> List[str]:
       """Enhanced rule-based distractor generation"""
       
-      # Comprehensive distractor pool with categories
-      distractor_pool = {
-          # Present tense verbs
-          'wake': ['wakes', 'waking', 'woken'],
-          'wake up': ['wakes up', 'waking up', 'woke up'],
-          'eat': ['eats', 'eating', 'eaten'],
-          'brush': ['brushes', 'brushing', 'brushed'],
-          'read': ['reads', 'reading', 'readed'],
-          'play': ['plays', 'playing', 'played'],
-          'like': ['likes', 'liking', 'liked'],
-          
-          # Past tense verbs
-          'went': ['go', 'goes', 'gone'],
-          'bought': ['buy', 'buys', 'buyed'],
-          'stayed': ['stay', 'stays', 'staying'],
-          'cooked': ['cook', 'cooks', 'cooking'],
-          
-          # Continuous forms
-          'playing': ['play', 'plays', 'played'],
-          'listening': ['listen', 'listens', 'listened'],
-          'reading': ['read', 'reads', 'readed'],
-          'waking': ['wake', 'wakes', 'woken'],
-          'cooking': ['cook', 'cooks', 'cooked'],
-          
-          # Nouns - singular/plural
-          'eggs': ['egg', 'egges', 'an egg'],
-          'teeth': ['tooth', 'teeths', 'tooths'],
-          'vegetables': ['vegetable', 'vegitable', 'vegitables'],
-          'days': ['day', 'daies', 'daily'],
-          'people': ['person', 'peoples', 'persons'],
-          'books': ['book', 'bookes', 'booking'],
-          'fruits': ['fruit', 'fruites', 'fruity'],
-          
-          # Articles
-          'a': ['an', 'the', 'some'],
-          'an': ['a', 'the', 'any'],
-          'the': ['a', 'an', 'this'],
-          
-          # Prepositions
-          'to': ['at', 'in', 'for'],
-          'at': ['in', 'on', 'to'],
-          'in': ['at', 'on', 'into'],
-          'for': ['to', 'at', 'since'],
-          'with': ['by', 'from', 'along'],
-          
-          # Adjectives/Adverbs
-          'comfortable': ['comfort', 'comfortably', 'comforted'],
-          'sometimes': ['sometime', 'some time', 'always'],
-          
-          # Time expressions
-          'yesterday': ['tomorrow', 'today', 'last day'],
-          'morning': ['evening', 'afternoon', 'mornings'],
-          
-          # Numbers
-          'five': ['four', 'fives', 'fifth'],
-          'three': ['two', 'third', 'threes']
-      }
+      # Tokenized words are usually lowercase already; skip the copy then
+      word_lower = correct_word if correct_word.islower() else correct_word.lower()
       
-      word_lower = correct_word.lower()
+      # Try to find in pool; everything else is rule-based and cached
+      pool = _DISTRACTOR_POOL.get(word_lower)
+      if pool:
+          # Randomize order for variety; sample copies, so the pool stays intact
+          pool = pool[:count]
+          return random.sample(pool, len(pool))
       
-      # Try to find in pool
-      if word_lower in distractor_pool:
-          distractors = distractor_pool[word_lower][:count]
-          # Randomize order for variety
-          import random
-          random.shuffle(distractors)
-          return distractors
-      
-      # Smart pattern-based generation
-      generated = []
-      
-      # Handle different word types
-      if word_lower.endswith('ed'):  # Past tense
-          base = word_lower[:-2] if not word_lower.endswith('ied') else word_lower[:-3] + 'y'
-          generated = [base, base + 's', base + 'ing']
-          
-      elif word_lower.endswith('ing'):  # Continuous
-          base = word_lower[:-3] if not word_lower.endswith('ying') else word_lower[:-4] + 'y'
-          generated = [base, base + 's', base + 'ed']
-          
-      elif word_lower.endswith('s') and len(word_lower) > 3:  # Plural/3rd person
-          base = word_lower[:-1] if not word_lower.endswith('es') else word_lower[:-2]
-          generated = [base, base + 'ing', base + 'ed']
-          
-      elif word_lower.endswith('ly'):  # Adverbs
-          base = word_lower[:-2]
-          generated = [base, base + 'ful', base + 'ness']
-      
-      # If still no distractors, use semantic groups
-      if not generated:
-          semantic_groups = {
-              'time': ['always', 'never', 'often', 'sometimes', 'usually'],
-              'quantity': ['many', 'few', 'some', 'all', 'most'],
-              'quality': ['good', 'bad', 'nice', 'great', 'fine'],
-              'action': ['do', 'make', 'take', 'get', 'have']
-          }
-          
-          # Find which group the word might belong to
-          for group, words in semantic_groups.items():
-              if word_lower in words:
-                  generated = [w for w in words if w != word_lower][:count]
-                  break
-      
-      # Final fallback - common confusing words
-      if not generated:
-          common_confusions = ['then', 'than', 'there', 'their', 'were', 'where', 
-                              'your', 'you\'re', 'its', 'it\'s', 'to', 'too']
-          generated = [w for w in common_confusions if w != word_lower][:count]
-      
-      return generated[:count]
+      return list(_pattern_distractors(word_lower, count))
     
     def translate_phrase(self, phrase: str, target_lang: str = 'Hebrew') -> str:
         """Translate phrase for flashcards"""
-        
-        # Simple translation dictionary (expandable)
-        translations = {
-            'wake up': 'להתעורר (lehitorer)',
-            'breakfast': 'ארוחת בוקר (aruchat boker)',
-            'bread': 'לחם (lechem)',
-            'eggs': 'ביצים (beitzim)',
-            'teeth': 'שיניים (shinayim)',
-            'football': 'כדורגל (kaduregel)',
-            'music': 'מוזיקה (muzika)',
-            'books': 'ספרים (sefarim)',
-            'family': 'משפחה (mishpacha)',
-            'father': 'אבא (aba)',
-            'mother': 'אמא (ima)',
-            'engineer': 'מהנדס (mihandes)',
-            'teacher': 'מורה (mora)',
-            'market': 'שוק (shuk)',
-            'vegetables': 'ירקות (yerakot)',
-            'fruits': 'פירות (priyot)',
-            'yesterday': 'אתמול (etmol)',
-            'hotel': 'מלון (malon)',
-            'comfortable': 'נוח (noach)',
-            'sometimes': 'לפעמים (lepaamim)'
-        }
-        
-        phrase_lower = phrase.lower()
-        return translations.get(phrase_lower, f"[{phrase}]")
+        return _TRANSLATIONS.get(phrase.lower(), f"[{phrase}]")
+    
+    def translate_phrases_batch(self, phrases: List[str], target_lang: str = 'Hebrew') -> List[str]:
+        """Translate many phrases in one call, preserving input order"""
+        return [self.translate_phrase(phrase, target_lang) for phrase in phrases]
     
     def extract_vocabulary_with_ai(self, transcript: str, max_words: int = 15) -> List[Dict[str, str]]:
         """Extract vocabulary using optimized AI prompts"""
+        prompt, cache_key, result = self._prepare_vocab_request(transcript, max_words)
+        if prompt is None:
+            return result
         
-        if not self.enabled or not self.model:
-            logger.warning("Gemini AI not available, using fallback")
+        try:
+            response = self._generate_with_retry(prompt)
+            return self._vocabulary_from_response(response, transcript, max_words, cache_key)
+        except Exception as e:
+            logger.error(f"Gemini AI vocabulary extraction failed: {e}")
             return self._fallback_vocabulary_extraction(transcript, max_words)
+    
+    async def aextract_vocabulary_with_ai(self, transcript: str, max_words: int = 15) -> List[Dict[str, str]]:
+        """
+        Async variant of extract_vocabulary_with_ai
+        
+        Many transcripts can be gathered at once; in-flight requests follow an
+        adaptive limit of at most GEMINI_MAX_CONCURRENCY per helper.
+        """
+        prompt, cache_key, result = self._prepare_vocab_request(transcript, max_words)
+        if prompt is None:
+            return result
         
         try:
-            # Select prompt based on style
-            if self.prompt_style == 'detailed':
-                prompt = self._get_detailed_vocab_prompt(transcript, max_words)
-            elif self.prompt_style == 'simple':
-                prompt = self._get_simple_vocab_prompt(transcript, max_words)
-            else:  # role-based
-                prompt = self._get_role_vocab_prompt(transcript, max_words)
-            
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
+            response = await self._agenerate_with_retry(prompt)
+            return self._vocabulary_from_response(response, transcript, max_words, cache_key)
+        except Exception as e:
+            logger.error(f"Gemini AI vocabulary extraction failed: {e}")
+            return self._fallback_vocabulary_extraction(transcript, max_words)
+    
+    def extract_vocabulary_batch_with_ai(self, transcripts: List[str],
+                                         max_words: int = 15) -> List[List[Dict[str, str]]]:
+        """
+        Extract vocabulary for many transcripts concurrently, preserving input order
+        
+        Synchronous: it runs its own event loop, so async callers (e.g. API
+        handlers) must await aextract_vocabulary_batch_with_ai instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.aextract_vocabulary_batch_with_ai(transcripts, max_words))
+        raise RuntimeError(
+            "extract_vocabulary_batch_with_ai cannot run inside an event loop; "
+            "await aextract_vocabulary_batch_with_ai instead"
+        )
+    
+    async def aextract_vocabulary_batch_with_ai(self, transcripts: List[str],
+                                                max_words: int = 15) -> List[List[Dict[str, str]]]:
+        """
+        Async variant of extract_vocabulary_batch_with_ai
+        
+        Short transcripts are packed up to _BATCH_PROMPT_SIZE to a request;
+        longer ones get a request each.
+        """
+        short = [i for i, t in enumerate(transcripts) if len(t) <= _SHORT_TRANSCRIPT_CHARS]
+        groups = [[i] for i, t in enumerate(transcripts) if len(t) > _SHORT_TRANSCRIPT_CHARS]
+        groups += [short[k:k + _BATCH_PROMPT_SIZE] for k in range(0, len(short), _BATCH_PROMPT_SIZE)]
+        
+        group_results = await asyncio.gather(*(
+            self._aextract_vocabulary_group([transcripts[i] for i in group], max_words)
+            for group in groups
+        ))
+        
+        results = [None] * len(transcripts)
+        for group, vocabularies in zip(groups, group_results):
+            for i, vocabulary in zip(group, vocabularies):
+                results[i] = vocabulary
+        return results
+    
+    async def _aextract_vocabulary_group(self, transcripts: List[str],
+                                         max_words: int) -> List[List[Dict[str, str]]]:
+        """
+        Extract vocabulary for several transcripts with one Gemini request
+        
+        Cached transcripts are served from the cache; if the combined response
+        doesn't hold one JSON array per transcript, each is extracted on its own.
+        """
+        results = []
+        pending = []
+        for transcript in transcripts:
+            cache_key = _prompt_digest(self._vocab_prompt(transcript, max_words))
+            cached = self._cached_vocabulary(cache_key)
+            results.append(cached)
+            if cached is None:
+                pending.append((len(results) - 1, transcript, cache_key))
+        
+        if len(pending) > 1 and self.enabled and self.model:
+            try:
+                prompt = self._get_batch_vocab_prompt([t for _, t, _ in pending], max_words)
+                response = await self._agenerate_with_retry(prompt)
+                parsed = self._parse_json_response(response.text.strip(), expect_array=False) if response else None
+                arrays = parsed.get('results') if isinstance(parsed, dict) else None
+                
+                if isinstance(arrays, list) and len(arrays) == len(pending) \
+                        and all(isinstance(a, list) for a in arrays):
+                    for (i, transcript, cache_key), vocab_list in zip(pending, arrays):
+                        vocab_list = [item for item in vocab_list if isinstance(item, dict)]
+                        results[i] = self._vocabulary_from_list(vocab_list, transcript, max_words, cache_key)
+                    return results
+                logger.warning("Could not parse batched Gemini response, extracting one by one")
+            except Exception as e:
+                logger.error(f"Gemini AI batched vocabulary extraction failed: {e}")
+        
+        vocabularies = await asyncio.gather(*(
+            self.aextract_vocabulary_with_ai(transcript, max_words) for _, transcript, _ in pending
+        ))
+        for (i, _, _), vocabulary in zip(pending, vocabularies):
+            results[i] = vocabulary
+        return results
+    
+    @contextlib.asynccontextmanager
+    async def _gemini_slot(self):
+        """Wait until the running loop has fewer requests in flight than the current limit"""
+        loop = asyncio.get_running_loop()
+        gate = self._gates.get(loop)
+        if gate is None:
+            gate = self._gates[loop] = {'in_flight': 0, 'condition': asyncio.Condition()}
+        condition = gate['condition']
+        
+        async with condition:
+            await condition.wait_for(lambda: gate['in_flight'] < int(self._concurrency))
+            gate['in_flight'] += 1
+        try:
+            yield
+        finally:
+            async with condition:
+                gate['in_flight'] -= 1
+                condition.notify_all()
+    
+    def _generate_with_retry(self, prompt: str):
+        """
+        Call Gemini, retrying transient errors with backoff
+        
+        Returns None once the circuit is open; raises the last error when
+        retries run out or the error is not transient.
+        """
+        for attempt in range(_RETRY_ATTEMPTS):
+            if self._breaker_open():
+                return None
             
-            # Parse JSON response
-            vocab_list = self._parse_json_response(result_text)
+            reservation, wait = _TOKEN_WINDOW.reserve(len(prompt) // 4)
+            while reservation is None:
+                logger.warning(f"Gemini token budget reached, waiting {wait:.1f}s")
+                time.sleep(wait)
+                reservation, wait = _TOKEN_WINDOW.reserve(len(prompt) // 4)
             
-            if vocab_list:
-                # Validate quality
-                validated = self._validate_vocabulary(vocab_list, transcript)
-                logger.info(f"[OK] Gemini AI extracted {len(validated)} vocabulary words")
-                return validated[:max_words]
+            started = time.perf_counter()
+            try:
+                response = self.model.generate_content(prompt)
+            except Exception as e:
+                time.sleep(self._retry_delay_after(e, attempt))
             else:
-                logger.warning("Could not parse Gemini response, using fallback")
-                return self._fallback_vocabulary_extraction(transcript, max_words)
+                self._record_response(response, started, reservation)
+                return response
+    
+    async def _agenerate_with_retry(self, prompt: str):
+        """Async _generate_with_retry; no concurrency slot is held while waiting or backing off"""
+        for attempt in range(_RETRY_ATTEMPTS):
+            reservation, wait = _TOKEN_WINDOW.reserve(len(prompt) // 4)
+            while reservation is None:
+                logger.warning(f"Gemini token budget reached, waiting {wait:.1f}s")
+                await asyncio.sleep(wait)
+                reservation, wait = _TOKEN_WINDOW.reserve(len(prompt) // 4)
+            
+            async with self._gemini_slot():
+                if self._breaker_open():
+                    return None
                 
-        except Exception as e:
-            logger.error(f"Gemini AI vocabulary extraction failed: {e}")
+                started = time.perf_counter()
+                try:
+                    response = await self.model.generate_content_async(prompt)
+                except Exception as e:
+                    delay = self._retry_delay_after(e, attempt)
+                else:
+                    self._record_response(response, started, reservation)
+                    return response
+            
+            await asyncio.sleep(delay)
+    
+    def _retry_delay_after(self, error: Exception, attempt: int) -> float:
+        """
+        Account for a failed attempt and return the backoff before the next one
+        
+        Re-raises the error when it isn't transient or it was the last attempt.
+        """
+        if not isinstance(error, _TRANSIENT_ERRORS):
+            raise error
+        if isinstance(error, _THROTTLE_ERRORS):
+            self._record_throttle()
+        if attempt + 1 == _RETRY_ATTEMPTS:
+            raise error
+        
+        delay = _retry_delay(attempt)
+        logger.warning(f"Gemini request failed ({error}), retrying in {delay:.1f}s")
+        return delay
+    
+    def _record_response(self, response, started: float, reservation: list):
+        """Feed a successful call's latency and token use back into the limiters"""
+        self._record_success(time.perf_counter() - started)
+        _TOKEN_WINDOW.settle(reservation, _response_tokens(response))
+    
+    def _record_success(self, latency: float):
+        """Additive increase while Gemini answers within the latency target"""
+        self._throttles.clear()
+        if latency <= _TARGET_LATENCY:
+            self._concurrency = min(float(self.max_concurrency), self._concurrency + _CONCURRENCY_STEP)
+    
+    def _record_throttle(self):
+        """Multiplicative decrease on a 429; repeated ones open the circuit"""
+        now = self._clock()
+        self._concurrency = max(1.0, self._concurrency * _CONCURRENCY_BACKOFF)
+        self._throttles.append(now)
+        logger.warning(f"Gemini rate limited; concurrency reduced to {int(self._concurrency)}")
+        
+        if len(self._throttles) == _BREAKER_THRESHOLD and now - self._throttles[0] <= _BREAKER_WINDOW:
+            self._breaker_open_until = now + _BREAKER_WINDOW
+            self._throttles.clear()
+            logger.warning(f"Gemini circuit open for {_BREAKER_WINDOW:.0f}s after repeated rate limits")
+    
+    def _breaker_open(self) -> bool:
+        return self._clock() < self._breaker_open_until
+    
+    def _cached_vocabulary(self, cache_key: bytes) -> Optional[List[Dict[str, str]]]:
+        """Copy of the vocabulary cached for a prompt digest, if any"""
+        with _vocab_cache_lock:
+            entry = _VOCAB_CACHE.get(cache_key)
+            if entry is None:
+                return None
+            _VOCAB_CACHE.move_to_end(cache_key)
+        
+        logger.info(f"[OK] Reused cached Gemini vocabulary ({len(entry)} words)")
+        return [dict(item) for item in entry]
+    
+    def _vocab_prompt(self, transcript: str, max_words: int) -> str:
+        """Select prompt based on style"""
+        if self.prompt_style == 'detailed':
+            return self._get_detailed_vocab_prompt(transcript, max_words)
+        elif self.prompt_style == 'simple':
+            return self._get_simple_vocab_prompt(transcript, max_words)
+        else:  # role-based
+            return self._get_role_vocab_prompt(transcript, max_words)
+    
+    def _prepare_vocab_request(self, transcript: str, max_words: int):
+        """
+        Prompt and cache key for a vocabulary request
+        
+        Returns (prompt, cache_key, None) when Gemini should be called, or
+        (None, None, vocabulary) when the fallback or the cache already answers.
+        """
+        if not self.enabled or not self.model:
+            logger.warning("Gemini AI not available, using fallback")
+            return None, None, self._fallback_vocabulary_extraction(transcript, max_words)
+        
+        prompt = self._vocab_prompt(transcript, max_words)
+        cache_key = _prompt_digest(prompt)
+        cached = self._cached_vocabulary(cache_key)
+        if cached is not None:
+            return None, None, cached
+        return prompt, cache_key, None
+    
+    def _vocabulary_from_response(self, response, transcript: str, max_words: int,
+                                  cache_key: Optional[bytes] = None) -> List[Dict[str, str]]:
+        """Parse and validate a vocabulary response (None while the circuit is open)"""
+        if response is None:
+            logger.warning("Gemini rate limited, circuit open; using fallback")
+            return self._fallback_vocabulary_extraction(transcript, max_words)
+        
+        return self._vocabulary_from_list(
+            self._parse_json_response(response.text.strip()), transcript, max_words, cache_key
+        )
+    
+    def _vocabulary_from_list(self, vocab_list: Optional[List[Dict]], transcript: str, max_words: int,
+                              cache_key: Optional[bytes] = None) -> List[Dict[str, str]]:
+        """
+        Validate parsed AI vocabulary, falling back if nothing was parsed
+        
+        Validated results are stored under cache_key; fallback results are not.
+        """
+        if vocab_list:
+            # Validate quality
+            validated = self._validate_vocabulary(vocab_list, transcript)[:max_words]
+            logger.info(f"[OK] Gemini AI extracted {len(validated)} vocabulary words")
+            
+            if cache_key is not None:
+                with _vocab_cache_lock:
+                    _VOCAB_CACHE[cache_key] = tuple(dict(item) for item in validated)
+                    if len(_VOCAB_CACHE) > _VOCAB_CACHE_SIZE:
+                        _VOCAB_CACHE.popitem(last=False)
+            return validated
+        else:
+            logger.warning("Could not parse Gemini response, using fallback")
             return self._fallback_vocabulary_extraction(transcript, max_words)
     
     def _get_detailed_vocab_prompt(self, transcript: str, max_words: int) -> str:
@@ -284,6 +755,48 @@ Transcript:
 Return ONLY a JSON array like:
 [{{"word": "...", "context": "...", "difficulty": "..."}}]"""
     
+    def _get_batch_vocab_prompt(self, transcripts: List[str], max_words: int) -> str:
+        """Prompt covering several transcripts in the configured style, answered with one array each"""
+        count = len(transcripts)
+        if self.prompt_style == 'detailed':
+            instructions = f"""Analyze these {count} conversation transcripts and, separately for each one, extract the most important English vocabulary words that would help an intermediate learner.
+
+Instructions:
+1. For each transcript, identify {max_words} useful English words or phrases (prioritize mistakes, key topics, and practical expressions).
+2. For each item include:
+   - "word": the vocabulary word or phrase
+   - "context": a simple example sentence from that transcript (or create a natural sentence if needed)
+   - "difficulty": "beginner", "intermediate", or "advanced\""""
+            limit = 2500
+        elif self.prompt_style == 'simple':
+            instructions = f"""From each of the following {count} transcripts, list {max_words} important English words that students should practice.
+For each entry include the word, a clear example sentence, and the difficulty level."""
+            limit = 2000
+        else:  # role-based
+            instructions = f"""You are preparing feedback for your ESL class. Review these {count} transcripts and, separately for each one, choose {max_words} vocabulary words your students must study.
+Focus on real-world usefulness, mistakes the students made, and each lesson's main theme.
+
+For each item report:
+- "word": the vocabulary item
+- "context": a short example sentence (prefer that transcript; otherwise craft a natural example)
+- "difficulty": beginner / intermediate / advanced"""
+            limit = 2500
+        
+        sections = "\n\n".join(
+            f"=== Transcript {n} ===\n{transcript[:limit]}" for n, transcript in enumerate(transcripts, 1)
+        )
+        return f"""{instructions}
+
+{sections}
+
+Format your response EXACTLY as a JSON object holding one array per transcript, in order. Example for 2 transcripts:
+{{"results": [
+  [{{"word": "breakfast", "context": "I eat breakfast at 8 AM.", "difficulty": "beginner"}}],
+  [{{"word": "comfortable", "context": "The hotel was very comfortable.", "difficulty": "intermediate"}}]
+]}}
+
+Return ONLY the JSON object with no extra commentary."""
+    
     def extract_sentences_with_ai(self, transcript: str, max_sentences: int = 10) -> List[Dict[str, str]]:
         """Extract quality practice sentences using Gemini AI"""
         
@@ -317,20 +830,20 @@ Format your response EXACTLY as a JSON array:
 
 Return ONLY the JSON array with no extra text."""
 
-            response = self.model.generate_content(prompt)
+            response = self._generate_with_retry(prompt)
+            if response is None:
+                logger.warning("Gemini rate limited, circuit open; skipping sentence extraction")
+                return []
             
-            if not response or not response.text:
+            if not response.text:
                 logger.warning("Empty response from Gemini sentence extraction")
                 return []
             
             # Parse JSON response
-            import json
-            import re
-            
             text = response.text.strip()
             # Remove markdown code blocks if present
-            text = re.sub(r'^```(?:json)?\s*', '', text)
-            text = re.sub(r'\s*```$', '', text)
+            text = _LEADING_FENCE_RE.sub('', text)
+            text = _TRAILING_FENCE_RE.sub('', text)
             
             sentences_data = json.loads(text)
             
@@ -394,7 +907,10 @@ Format as JSON:
 
 Return only the JSON object."""
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_with_retry(prompt)
+            if response is None:
+                logger.warning("Gemini rate limited, circuit open; using fallback feedback")
+                return self._fallback_feedback(transcript)
             result_text = response.text.strip()
             
             # Parse JSON
@@ -450,7 +966,10 @@ Format as JSON array:
 
 Return only the JSON array with {count} exercises."""
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_with_retry(prompt)
+            if response is None:
+                logger.warning("Gemini rate limited, circuit open; skipping fill-in-blank generation")
+                return []
             result_text = response.text.strip()
             
             exercises = self._parse_json_response(result_text)
@@ -504,7 +1023,10 @@ Format as JSON array:
 
 Return only the JSON array with {count} words."""
             
-            response = self.model.generate_content(prompt)
+            response = self._generate_with_retry(prompt)
+            if response is None:
+                logger.warning("Gemini rate limited, circuit open; skipping spelling generation")
+                return []
             result_text = response.text.strip()
             
             spelling_words = self._parse_json_response(result_text)
@@ -524,14 +1046,11 @@ Return only the JSON array with {count} words."""
         """Parse JSON from AI response with error handling"""
         try:
             # Remove markdown code blocks if present
-            text = re.sub(r'```json\s*', '', text)
-            text = re.sub(r'```\s*', '', text)
+            text = _FENCE_JSON_RE.sub('', text)
+            text = _FENCE_RE.sub('', text)
             
             # Try to find JSON in response
-            if expect_array:
-                json_match = re.search(r'\[.*\]', text, re.DOTALL)
-            else:
-                json_match = re.search(r'\{.*\}', text, re.DOTALL)
+            json_match = (_JSON_RE if expect_array else _JSON_OBJECT_RE).search(text)
             
             if json_match:
                 return json.loads(json_match.group())
@@ -551,18 +1070,13 @@ Return only the JSON array with {count} words."""
         validated = []
         seen_words = set()
         
-        # Common words to exclude
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'is', 'are', 'was', 'were', 
-                     'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
-                     'i', 'you', 'he', 'she', 'it', 'we', 'they', 'this', 'that'}
-        
         for item in vocab_list:
             word = item.get('word', '').lower().strip()
             
             # Validation checks
             if not word:
                 continue
-            if word in stop_words:
+            if word in _AI_STOP_WORDS:
                 continue
             if word in seen_words:
                 continue
@@ -594,44 +1108,27 @@ Return only the JSON array with {count} words."""
     
     def _fallback_vocabulary_extraction(self, transcript: str, max_words: int = 15) -> List[Dict[str, str]]:
         """Fallback: Extract common English words from transcript"""
-        import re
-        from collections import Counter
-        
-        # Common words to skip
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-                     'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been',
-                     'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'should',
-                     'can', 'could', 'may', 'might', 'this', 'that', 'these', 'those',
-                     'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
-                     'my', 'your', 'his', 'her', 'its', 'our', 'their', 'so', 'if', 'as', 'all',
-                     'just', 'like', 'okay', 'ok', 'yeah', 'yes', 'no', 'not', 'now', 'then'}
+        # Stream words straight into the counter, skipping stop words
+        words = (match.group() for match in _WORD_RE.finditer(transcript.lower()))
+        word_counts = Counter(w for w in words if w not in _STOP_WORDS)
         
-        # Extract words
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', transcript.lower())
-        
-        # Filter and count
-        filtered_words = [w for w in words if w not in stop_words]
-        word_counts = Counter(filtered_words)
+        # Index each word's first sentence in one pass for context lookups
+        sentences = _SENT_RE.split(transcript)
+        first_sentence = {}
+        for i, sentence in enumerate(sentences):
+            for token in _WORD_RE.findall(sentence.lower()):
+                first_sentence.setdefault(token, i)
         
         # Get most common
         vocabulary = []
         for word, count in word_counts.most_common(max_words):
-            # Find context sentence
-            sentences = re.split(r'[.!?]', transcript)
-            context = ""
-            for sentence in sentences:
-                if word in sentence.lower():
-                    context = sentence.strip()[:100]
-                    break
-            
-            if context:
-                vocabulary.append({
-                    'word': word,
-                    'context': context,
-                    'difficulty': 'intermediate',
-                    'category': 'extracted',
-                    'priority': 'medium'
-                })
+            vocabulary.append({
+                'word': word,
+                'context': sentences[first_sentence[word]].strip()[:100],
+                'difficulty': 'intermediate',
+                'category': 'extracted',
+                'priority': 'medium'
+            })
         
         logger.info(f"[OK] Fallback extracted {len(vocabulary)} vocabulary words")
         return vocabulary
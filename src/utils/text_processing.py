@@ -4,7 +4,53 @@ Production-ready text parsing and analysis
 """
 
 import re
-from typing import List, Tuple, Dict
+import string
+import sys
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple, Dict
+
+# str.translate table deleting punctuation (ASCII plus typographic quotes/dashes)
+# but keeping '_' like \w does; meant for whitespace-split tokens, so
+# whitespace is left alone
+PUNCT_TABLE = str.maketrans('', '', string.punctuation.replace('_', '') + '“”‘’–—…')
+
+# Splits inline transcripts ahead of each speaker label
+_SPEAKER_SPLIT_RE = re.compile(r'(?=(?:Teacher|Student):)')
+
+# Correction patterns, tried in order – covers quoted and unquoted corrections
+_CORRECTION_RES = tuple(re.compile(pat) for pat in (
+    # "Correction: I bought..." -> "I bought..."
+    r"[Cc]orrect(?:ion)?[:]?\s+([A-Z][^.!?]+)",
+    # "The correct sentence is: Yesterday I went..." -> "Yesterday I went..."
+    r"The correct sentence is[:\s]+([A-Z][^.!?]+)",
+    # "should be: I am..." -> "I am..."
+    r"(?:It\s+)?should\s+be[:\s]+([A-Z][^.!?]+)",
+    # "Better: My father..." -> "My father..."
+    r"[Bb]etter[:\s]+([A-Z][^.!?]+)",
+    # "Correct: My father is an engineer" -> "My father is an engineer"
+    r"[Cc]orrect[:\s]+([A-Z][^.!?]+)"
+))
+
+# Every correction pattern needs one of these literals; lines without any
+# of them skip the regex scans entirely
+_CORRECTION_KEYWORDS = ('orrect', 'should', 'etter')
+
+_WORD_RE = re.compile(r"\b[a-zA-Z]+\b")
+
+# Key phrases detected alongside single words
+_KEY_PHRASE_RES = (
+    ("wake up", re.compile(r"\bwake\s+up\b")),
+    ("brush teeth", re.compile(r"\bbrush(?:ing)?\s+(?:my\s+)?teeth\b")),
+    ("free time", re.compile(r"\bfree\s+time\b")),
+    ("last year", re.compile(r"\blast\s+year\b")),
+)
+
+
+class ParsedTranscript(NamedTuple):
+    """Everything the extractors read from a transcript's lines, gathered in one pass"""
+    corrections: Tuple[Tuple[str, str], ...]
+    teacher_lines: Tuple[str, ...]
+    student_lines: Tuple[str, ...]
 
 
 class TextProcessor:
@@ -12,70 +58,82 @@ class TextProcessor:
 
     # ------------------------------------------------------------------
     @staticmethod
-    def extract_corrections(transcript: str) -> List[Tuple[str, str]]:
+    @lru_cache(maxsize=8)
+    def parse_transcript(transcript: str) -> ParsedTranscript:
         """
-        Extract student mistakes and teacher corrections – tolerant to punctuation,
-        quotes, and trailing periods.
+        Split the transcript into lines once and collect corrections, teacher
+        utterances and student utterances together. Cached, since every
+        extractor parses the same transcript.
         """
         corrections: List[Tuple[str, str]] = []
+        teacher_lines: List[str] = []
+        student_lines: List[str] = []
+        
+        raw_lines = transcript.split("\n")
         
         # Handle both newline-separated and inline transcripts
         if '\n' in transcript:
-            lines = transcript.strip().split("\n")
+            # Blank and whitespace-only lines can't hold a speaker label, so the
+            # raw lines pair corrections up exactly as the stripped ones would
+            lines = raw_lines
         else:
             # Split on Teacher:/Student: markers for inline transcripts
-            lines = re.split(r'(?=(?:Teacher|Student):)', transcript.strip())
+            lines = _SPEAKER_SPLIT_RE.split(transcript.strip())
             lines = [l.strip() for l in lines if l.strip()]
-
+        
+        for line in raw_lines:
+            if line.startswith("Student:"):
+                student_lines.append(line.replace("Student:", "").strip())
+            elif line.startswith("Teacher:"):
+                teacher_lines.append(line.replace("Teacher:", "").strip())
+        
         for i, line in enumerate(lines):
             if "Teacher:" not in line:
                 continue
-            teacher_line = line.replace("Teacher:", "").strip()
-
-            # patterns – covers quoted and unquoted corrections
-            patterns = [
-                # "Correction: I bought..." -> "I bought..."
-                r"[Cc]orrect(?:ion)?[:]?\s+([A-Z][^.!?]+)",
-                # "The correct sentence is: Yesterday I went..." -> "Yesterday I went..."
-                r"The correct sentence is[:\s]+([A-Z][^.!?]+)",
-                # "should be: I am..." -> "I am..."
-                r"(?:It\s+)?should\s+be[:\s]+([A-Z][^.!?]+)",
-                # "Better: My father..." -> "My father..."
-                r"[Bb]etter[:\s]+([A-Z][^.!?]+)",
-                # "Correct: My father is an engineer" -> "My father is an engineer"
-                r"[Cc]orrect[:\s]+([A-Z][^.!?]+)"
-            ]
-
-            for pat in patterns:
-                match = re.search(pat, teacher_line)
-                if not match:
-                    continue
-                correct = match.group(1).strip().strip('\"“”\' ')
-                if i > 0 and "Student:" in lines[i - 1]:
-                    incorrect = lines[i - 1].replace("Student:", "").strip().strip('\"“”\' ')
-                    if incorrect and correct:
-                        corrections.append((incorrect, correct))
-                break
-        return corrections
+            correction = TextProcessor._match_correction(line, lines[i - 1] if i > 0 else None)
+            if correction:
+                corrections.append(correction)
+        
+        return ParsedTranscript(tuple(corrections), tuple(teacher_lines), tuple(student_lines))
+
+    @staticmethod
+    def _match_correction(line: str, previous_line: Optional[str]) -> Optional[Tuple[str, str]]:
+        """Pair a teacher correction with the student line just before it."""
+        teacher_line = line.replace("Teacher:", "").strip()
+        if not any(keyword in teacher_line for keyword in _CORRECTION_KEYWORDS):
+            return None
+
+        for pattern in _CORRECTION_RES:
+            match = pattern.search(teacher_line)
+            if not match:
+                continue
+            correct = match.group(1).strip().strip('\"“”\' ')
+            if previous_line is not None and "Student:" in previous_line:
+                incorrect = previous_line.replace("Student:", "").strip().strip('\"“”\' ')
+                if incorrect and correct:
+                    return incorrect, correct
+            return None
+        return None
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def extract_corrections(transcript: str) -> List[Tuple[str, str]]:
+        """
+        Extract student mistakes and teacher corrections – tolerant to punctuation,
+        quotes, and trailing periods.
+        """
+        return list(TextProcessor.parse_transcript(transcript).corrections)
 
     # ------------------------------------------------------------------
     @staticmethod
     def extract_student_utterances(transcript: str) -> List[str]:
         """Extract all student utterances."""
-        return [
-            l.replace("Student:", "").strip()
-            for l in transcript.split("\n")
-            if l.startswith("Student:")
-        ]
+        return list(TextProcessor.parse_transcript(transcript).student_lines)
 
     @staticmethod
     def extract_teacher_utterances(transcript: str) -> List[str]:
         """Extract all teacher utterances."""
-        return [
-            l.replace("Teacher:", "").strip()
-            for l in transcript.split("\n")
-            if l.startswith("Teacher:")
-        ]
+        return list(TextProcessor.parse_transcript(transcript).teacher_lines)
 
     # ------------------------------------------------------------------
     @staticmethod
@@ -109,27 +167,23 @@ class TextProcessor:
         }
 
         # Break to words
-        words = re.findall(r"\b[a-zA-Z]+\b", sentence.lower())
+        sentence_lower = sentence.lower()
+        words = _WORD_RE.findall(sentence_lower)
         vocab = [w for w in words if w not in stop_words and len(w) > 2]
 
         # detect key phrases
-        phrases = {
-            "wake up": r"\bwake\s+up\b",
-            "brush teeth": r"\bbrush(?:ing)?\s+(?:my\s+)?teeth\b",
-            "free time": r"\bfree\s+time\b",
-            "last year": r"\blast\s+year\b",
-        }
-        for phrase, pat in phrases.items():
-            if re.search(pat, sentence.lower()):
+        for phrase, pattern in _KEY_PHRASE_RES:
+            if pattern.search(sentence_lower):
                 vocab.append(phrase)
 
         # normalize phrasal verbs before deduplication
         normalized = [w.split()[0] if " " in w else w for w in vocab]
 
-        # deduplicate preserving order
+        # deduplicate preserving order; words recur across lessons, so share one
+        # interned object per word
         seen, unique = set(), []
         for w in normalized:
             if w not in seen:
-                unique.append(w)
+                unique.append(sys.intern(w))
                 seen.add(w)
         return unique[:5]
\ No newline at end of file
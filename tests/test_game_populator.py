@@ -0,0 +1,239 @@
+"""
+Unit tests for the game table populator
+Validates chunked inserts against a fake Supabase client
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import game_populator
+from src.utils.game_populator import GamePopulator
+
+
+class APIError(Exception):
+    """Stands in for postgrest's error, which carries the Postgres SQLSTATE"""
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeTable:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.rows = None
+
+    def select(self, *columns, **options):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def in_(self, column, values):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def maybe_single(self):
+        return self
+
+    def insert(self, rows):
+        self.rows = rows
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self.rows = rows
+        return self
+
+    def execute(self):
+        if self.rows is None:
+            # A select: answer with the canned result for this table
+            result = self.client.selects[self.name]
+            if isinstance(result, Exception):
+                raise result
+            return FakeResponse(result)
+        self.client.chunk_sizes.append(len(self.rows))
+        error = self.client.fail(self.rows)
+        if error:
+            raise error
+        self.client.stored.extend(self.rows)
+        return FakeResponse(list(self.rows))
+
+
+class FakeRpc:
+    def __init__(self, error):
+        self.error = error
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return FakeResponse(None)
+
+
+class FakeClient:
+    """Records every chunk sent; fail(rows) returns an error to raise, if any"""
+
+    def __init__(self, fail):
+        self.fail = fail
+        self.stored = []
+        self.chunk_sizes = []
+        self.rpc_calls = []
+        self.rpc_error = None
+        self.selects = {}
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+    def rpc(self, name, params):
+        self.rpc_calls.append(name)
+        return FakeRpc(self.rpc_error)
+
+
+def timeout_over(limit):
+    def fail(rows):
+        if len(rows) > limit:
+            return APIError('canceling statement due to statement timeout', game_populator._STATEMENT_TIMEOUT)
+    return fail
+
+
+class TestInsertRows(unittest.TestCase):
+    """Test chunked inserts that back off on statement timeouts"""
+
+    def setUp(self):
+        self.populator = GamePopulator('https://example.supabase.co', 'test-key')
+        self.rows = [{'id': f'row_{i}', 'lesson_id': 'lesson_1'} for i in range(60)]
+
+        patcher = mock.patch.object(game_populator.time, 'sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_timeouts_shrink_chunks_until_rows_land(self):
+        """Should halve the chunk on each timeout and still insert every row once"""
+        client = self.populator._client = FakeClient(timeout_over(25))
+
+        inserted = self.populator._insert_rows('cloze_items', self.rows, on_conflict='id')
+
+        self.assertEqual(inserted, 60)
+        self.assertEqual(client.stored, self.rows)
+        self.assertEqual(client.chunk_sizes, [60, 50, 25, 25, 10])
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [0.1 * 2, 0.1 * 4])
+
+    def test_non_transient_error_skips_chunk(self):
+        """Should skip a chunk a smaller retry won't fix and keep going"""
+        bad_row = self.rows[10]
+        client = self.populator._client = FakeClient(
+            lambda rows: APIError('null value in column "lesson_id"', '23502') if bad_row in rows else None)
+        rows = self.rows + [{'id': f'row_{i}', 'lesson_id': 'lesson_1'} for i in range(60, 150)]
+
+        inserted = self.populator._insert_rows('cloze_items', rows, on_conflict='id')
+
+        self.assertEqual(inserted, 50)
+        self.assertEqual(client.stored, rows[100:])
+        self.assertEqual(client.chunk_sizes, [100, 50])
+        self.sleep.assert_not_called()
+
+    def test_timeout_at_minimum_chunk_skips_chunk(self):
+        """Should skip chunks that still time out at the minimum size and count the rest"""
+        failing = {row['id'] for row in self.rows[:10]}
+        client = self.populator._client = FakeClient(
+            lambda rows: APIError('canceling statement due to statement timeout', game_populator._STATEMENT_TIMEOUT)
+            if len(rows) > 25 or failing & {row['id'] for row in rows} else None)
+
+        inserted = self.populator._insert_rows('words', self.rows)
+
+        self.assertEqual(inserted, 50)
+        self.assertEqual(client.stored, self.rows[10:])
+        self.assertEqual(client.chunk_sizes, [60, 50, 25, 12, 10, 10, 10, 10, 10, 10])
+
+
+class TestPopulateLessonRows(unittest.TestCase):
+    """Test lesson item inserts and the count kept on the lesson"""
+
+    def setUp(self):
+        self.populator = GamePopulator('https://example.supabase.co', 'test-key')
+        self.populator._lesson_rpc_available = False
+        self.rows = [{'id': f'ac_lesson_1_{i}', 'lesson_id': 'lesson_1'} for i in range(150)]
+
+    def test_partial_insert_returns_rows_that_landed(self):
+        """Should count only the chunks that went in and still update the lesson count"""
+        bad_row = self.rows[120]
+        client = self.populator._client = FakeClient(
+            lambda rows: APIError('value too long for type', '22001') if bad_row in rows else None)
+
+        inserted = self.populator._populate_lesson_rows('cloze', self.rows)
+
+        self.assertEqual(inserted, 100)
+        self.assertEqual(client.stored, self.rows[:100])
+        self.assertEqual(client.rpc_calls, ['update_lesson_count'])
+
+    def test_transient_rpc_error_falls_back_once(self):
+        """Should insert client-side after an RPC timeout but keep using the RPC"""
+        self.populator._lesson_rpc_available = True
+        client = self.populator._client = FakeClient(lambda rows: None)
+        client.rpc_error = APIError('canceling statement due to statement timeout',
+                                    game_populator._STATEMENT_TIMEOUT)
+
+        inserted = self.populator._populate_lesson_rows('cloze', self.rows)
+
+        self.assertEqual(inserted, 150)
+        self.assertTrue(self.populator._lesson_rpc_available)
+
+    def test_missing_rpc_is_not_called_again(self):
+        """Should stop calling populate_lesson_items once it's known not to exist"""
+        self.populator._lesson_rpc_available = True
+        client = self.populator._client = FakeClient(lambda rows: None)
+        client.rpc_error = APIError('Could not find the function public.populate_lesson_items', 'PGRST202')
+
+        self.populator._populate_lesson_rows('cloze', self.rows)
+
+        self.assertFalse(self.populator._lesson_rpc_available)
+        self.assertEqual(client.stored, self.rows)
+
+
+class TestPopulateWordLists(unittest.TestCase):
+    """Test migrating summary flashcards into an existing word list"""
+
+    def setUp(self):
+        self.populator = GamePopulator('https://example.supabase.co', 'test-key')
+        self.client = self.populator._client = FakeClient(lambda rows: None)
+        self.client.selects = {
+            'zoom_summaries': {
+                'lesson_number': 1,
+                'flashcards': [{'word': 'breakfast', 'translation': 'ארוחת בוקר'},
+                               {'word': 'market', 'translation': 'שוק'}],
+                'spelling': [],
+            },
+            'word_lists': {'id': 'list_1'},
+            'words': [{'word': 'breakfast'}],
+        }
+
+    def test_skips_words_already_in_list(self):
+        """Should add only the words the list doesn't have yet"""
+        list_id = self.populator.populate_word_lists_from_zoom_summary(7, 'user_1')
+
+        self.assertEqual(list_id, 'list_1')
+        self.assertEqual([row['word'] for row in self.client.stored], ['market'])
+
+    def test_failed_lookup_skips_insert(self):
+        """Should not insert anything when stored words can't be fetched"""
+        self.client.selects['words'] = APIError('connection reset', '08006')
+
+        list_id = self.populator.populate_word_lists_from_zoom_summary(7, 'user_1')
+
+        self.assertIsNone(list_id)
+        self.assertEqual(self.client.stored, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,454 @@
+"""
+Unit tests for the Gemini helper
+Validates vocabulary requests and rate-limit handling with a fake model
+"""
+
+import unittest
+import asyncio
+import json
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import gemini_helper
+from src.utils.gemini_helper import GeminiHelper
+
+
+class ResourceExhausted(Exception):
+    """Stands in for google.api_core's 429 error"""
+
+
+class ServiceUnavailable(Exception):
+    """Stands in for google.api_core's 503 error"""
+
+
+VOCAB_RESPONSE = '[{"word": "breakfast", "context": "I eat breakfast.", "difficulty": "beginner"}]'
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Plays back queued exceptions, then answers with a vocabulary array"""
+
+    def __init__(self, errors=(), text=VOCAB_RESPONSE):
+        self.errors = list(errors)
+        self.text = text
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return FakeResponse(self.text)
+
+    async def generate_content_async(self, prompt):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return self.generate_content(prompt)
+        finally:
+            self.in_flight -= 1
+
+
+class BatchModel(FakeModel):
+    """Answers combined prompts with batch_text(transcript_count)"""
+
+    def __init__(self, batch_text):
+        super().__init__()
+        self.batch_text = batch_text
+        self.batch_calls = 0
+
+    def generate_content(self, prompt):
+        if '=== Transcript 1 ===' in prompt:
+            self.calls += 1
+            self.batch_calls += 1
+            return FakeResponse(self.batch_text(prompt.count('=== Transcript ')))
+        return super().generate_content(prompt)
+
+
+def batch_results(count):
+    return json.dumps({'results': [
+        [{'word': f'word{i}', 'context': f'Sentence {i}.', 'difficulty': 'beginner'}]
+        for i in range(count)
+    ]})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class GeminiTestCase(unittest.TestCase):
+    """Helper with a fake model, fresh module state and no real sleeping"""
+
+    def setUp(self):
+        patches = [
+            mock.patch.object(gemini_helper, '_THROTTLE_ERRORS', (ResourceExhausted,)),
+            mock.patch.object(gemini_helper, '_TRANSIENT_ERRORS', (ResourceExhausted, ServiceUnavailable)),
+            mock.patch.object(gemini_helper, '_retry_delay', return_value=0.0),
+            mock.patch.object(gemini_helper, '_TOKEN_WINDOW', gemini_helper._TokenWindow(10 ** 9)),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        gemini_helper._VOCAB_CACHE.clear()
+
+        self.helper = GeminiHelper()
+        self.helper.enabled = True
+        self.helper.model = FakeModel()
+        self.clock = FakeClock()
+        self.helper._clock = self.clock
+
+
+class TestAdaptiveConcurrency(GeminiTestCase):
+    """Test the AIMD limit on concurrent async requests"""
+
+    def test_limit_halves_on_throttle_and_grows_back(self):
+        """Should halve the limit on each 429 and add a step per fast success"""
+        start = self.helper._concurrency
+        self.helper.model = FakeModel(errors=[ResourceExhausted('429')])
+
+        asyncio.run(self.helper.aextract_vocabulary_with_ai('I eat breakfast.'))
+
+        # One throttle, then the retry succeeds
+        self.assertEqual(self.helper._concurrency, start / 2 + gemini_helper._CONCURRENCY_STEP)
+
+        for _ in range(20):
+            self.helper._record_success(0.1)
+        self.assertEqual(self.helper._concurrency, float(self.helper.max_concurrency))
+
+    def test_limit_never_drops_below_one(self):
+        """Should keep admitting one request however many 429s arrive"""
+        for _ in range(10):
+            self.helper._record_throttle()
+
+        self.assertEqual(self.helper._concurrency, 1.0)
+
+    def test_slow_successes_do_not_grow_limit(self):
+        """Should hold the limit while latency is over target"""
+        start = self.helper._concurrency
+        self.helper._record_success(gemini_helper._TARGET_LATENCY + 1)
+
+        self.assertEqual(self.helper._concurrency, start)
+
+    def test_in_flight_requests_follow_limit(self):
+        """Should never have more requests in flight than the current limit"""
+        self.helper._concurrency = 2.0
+        self.helper._record_success = lambda latency: None
+
+        async def gather():
+            return await asyncio.gather(*(
+                self.helper.aextract_vocabulary_with_ai(f'Lesson {i}: I eat breakfast.') for i in range(6)
+            ))
+
+        results = asyncio.run(gather())
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.helper.model.calls, 6)
+        self.assertEqual(self.helper.model.peak_in_flight, 2)
+
+
+class TestCircuitBreaker(GeminiTestCase):
+    """Test the circuit opened by repeated 429s"""
+
+    def test_opens_after_repeated_throttles_and_recovers(self):
+        """Should skip Gemini while open and call it again after the window"""
+        self.helper.model = FakeModel(errors=[ResourceExhausted('429')] * 3)
+
+        vocab = self.helper.extract_vocabulary_with_ai('I eat breakfast every morning.')
+
+        self.assertTrue(self.helper._breaker_open())
+        self.assertEqual(self.helper.model.calls, 3)
+        self.assertTrue(vocab)  # rule-based fallback
+
+        # While open, neither path reaches the model
+        self.helper.extract_vocabulary_with_ai('I drink coffee every morning.')
+        asyncio.run(self.helper.aextract_vocabulary_with_ai('I drink tea every morning.'))
+        self.assertEqual(self.helper.model.calls, 3)
+
+        self.clock.now += gemini_helper._BREAKER_WINDOW + 1
+
+        self.assertFalse(self.helper._breaker_open())
+        vocab = self.helper.extract_vocabulary_with_ai('I drink juice every morning.')
+        self.assertEqual(self.helper.model.calls, 4)
+        self.assertEqual(vocab[0]['word'], 'breakfast')
+
+    def test_success_resets_throttle_streak(self):
+        """Should only open for consecutive throttles"""
+        self.helper._record_throttle()
+        self.helper._record_throttle()
+        self.helper._record_success(0.1)
+        self.helper._record_throttle()
+
+        self.assertFalse(self.helper._breaker_open())
+
+    def test_spread_out_throttles_do_not_open(self):
+        """Should ignore throttles further apart than the window"""
+        for _ in range(3):
+            self.helper._record_throttle()
+            self.clock.now += gemini_helper._BREAKER_WINDOW
+
+        self.assertFalse(self.helper._breaker_open())
+
+    def test_other_generators_skip_model_while_open(self):
+        """Should send sentence, feedback and exercise requests through the breaker too"""
+        for _ in range(gemini_helper._BREAKER_THRESHOLD):
+            self.helper._record_throttle()
+        transcript = 'I eat breakfast every morning.'
+
+        self.assertEqual(self.helper.extract_sentences_with_ai(transcript), [])
+        self.assertEqual(self.helper.generate_lesson_feedback(transcript),
+                         self.helper._fallback_feedback(transcript))
+        self.assertEqual(self.helper.generate_fill_blank_exercises(transcript), [])
+        self.assertEqual(self.helper.generate_spelling_exercises(transcript), [])
+        self.assertEqual(self.helper.model.calls, 0)
+
+    def test_other_generators_retry_transient_errors(self):
+        """Should retry a 503 for sentence extraction like vocabulary requests"""
+        self.helper.model = FakeModel(errors=[ServiceUnavailable('503')],
+                                      text='[{"sentence": "I eat breakfast every morning."}]')
+
+        sentences = self.helper.extract_sentences_with_ai('I eat breakfast every morning.')
+
+        self.assertEqual(self.helper.model.calls, 2)
+        self.assertEqual(sentences[0]['sentence'], 'I eat breakfast every morning.')
+
+
+class TestVocabularyExtraction(GeminiTestCase):
+    """Test the shared sync/async vocabulary request handling"""
+
+    def test_sync_and_async_paths_agree(self):
+        """Should parse and validate responses the same way on both paths"""
+        sync_vocab = self.helper.extract_vocabulary_with_ai('I eat breakfast every morning.')
+        gemini_helper._VOCAB_CACHE.clear()
+        async_vocab = asyncio.run(self.helper.aextract_vocabulary_with_ai('I eat breakfast every morning.'))
+
+        self.assertEqual(sync_vocab, async_vocab)
+        self.assertEqual(sync_vocab[0]['word'], 'breakfast')
+
+    def test_repeat_transcript_served_from_cache(self):
+        """Should not call Gemini again for a transcript it already answered"""
+        self.helper.extract_vocabulary_with_ai('I eat breakfast every morning.')
+        asyncio.run(self.helper.aextract_vocabulary_with_ai('I eat breakfast every morning.'))
+
+        self.assertEqual(self.helper.model.calls, 1)
+
+    def test_unparseable_response_falls_back(self):
+        """Should use rule-based extraction when the response isn't JSON"""
+        self.helper.model = FakeModel(text='Sorry, I cannot help with that.')
+
+        vocab = self.helper.extract_vocabulary_with_ai('I eat breakfast every morning.')
+
+        self.assertTrue(vocab)
+        self.assertEqual(vocab[0]['category'], 'extracted')
+
+
+class TestBatchExtraction(GeminiTestCase):
+    """Test packing short transcripts into combined prompts"""
+
+    def test_short_transcripts_share_requests(self):
+        """Should pack short transcripts five to a request, in input order"""
+        self.helper.model = BatchModel(batch_results)
+        transcripts = [f'Lesson {i}: I eat breakfast.' for i in range(7)] + ['I eat breakfast. ' * 200]
+
+        results = self.helper.extract_vocabulary_batch_with_ai(transcripts)
+
+        self.assertEqual(self.helper.model.batch_calls, 2)
+        self.assertEqual(self.helper.model.calls, 3)
+        self.assertEqual([r[0]['word'] for r in results],
+                         ['word0', 'word1', 'word2', 'word3', 'word4', 'word0', 'word1', 'breakfast'])
+
+    def test_batch_prompt_follows_prompt_style(self):
+        """Should word and truncate combined prompts like the single-transcript style"""
+        transcripts = ['I eat breakfast. ' * 150, 'I drink coffee.']
+
+        for style, single in (('detailed', self.helper._get_detailed_vocab_prompt),
+                              ('simple', self.helper._get_simple_vocab_prompt),
+                              ('role', self.helper._get_role_vocab_prompt)):
+            self.helper.prompt_style = style
+            prompt = self.helper._get_batch_vocab_prompt(transcripts, 10)
+            sent = single(transcripts[0], 10).split('Transcript:\n')[1].split('\n\n')[0]
+
+            self.assertIn(f'=== Transcript 1 ===\n{sent}\n\n', prompt)
+            self.assertEqual(prompt.split()[0], single('', 10).split()[0])
+
+    def test_malformed_results_fall_back_per_transcript(self):
+        """Should extract each transcript on its own when the response isn't JSON"""
+        self.helper.model = BatchModel(lambda count: 'not json')
+        transcripts = [f'Lesson {i}: I eat breakfast.' for i in range(3)]
+
+        results = self.helper.extract_vocabulary_batch_with_ai(transcripts)
+
+        self.assertEqual(self.helper.model.batch_calls, 1)
+        self.assertEqual(self.helper.model.calls, 4)
+        self.assertEqual([r[0]['word'] for r in results], ['breakfast'] * 3)
+
+    def test_short_results_array_falls_back_per_transcript(self):
+        """Should not guess which transcript a missing array belonged to"""
+        self.helper.model = BatchModel(lambda count: batch_results(count - 1))
+        transcripts = [f'Lesson {i}: I eat breakfast.' for i in range(3)]
+
+        results = self.helper.extract_vocabulary_batch_with_ai(transcripts)
+
+        self.assertEqual(self.helper.model.calls, 4)
+        self.assertEqual([r[0]['word'] for r in results], ['breakfast'] * 3)
+
+    def test_non_array_entry_falls_back_per_transcript(self):
+        """Should reject results whose entries aren't all arrays"""
+        self.helper.model = BatchModel(lambda count: json.dumps({'results': [[], 'oops', []]}))
+        transcripts = [f'Lesson {i}: I eat breakfast.' for i in range(3)]
+
+        results = self.helper.extract_vocabulary_batch_with_ai(transcripts)
+
+        self.assertEqual(self.helper.model.calls, 4)
+        self.assertEqual([r[0]['word'] for r in results], ['breakfast'] * 3)
+
+    def test_sync_batch_refuses_running_loop(self):
+        """Should point async callers at the async variant"""
+        async def call_from_loop():
+            with self.assertRaises(RuntimeError):
+                self.helper.extract_vocabulary_batch_with_ai(['I eat breakfast.'])
+            return await self.helper.aextract_vocabulary_batch_with_ai(['I eat breakfast.'])
+
+        results = asyncio.run(call_from_loop())
+
+        self.assertEqual(results[0][0]['word'], 'breakfast')
+
+
+class TestTokenWindow(unittest.TestCase):
+    """Test the sliding-window tokens-per-minute budget"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.window = gemini_helper._TokenWindow(1000, clock=self.clock)  # 900 usable
+
+    def test_waits_until_oldest_request_leaves_window(self):
+        """Should ask for a wait until the oldest entry expires, then admit"""
+        self.window.reserve(600)
+        self.clock.now += 20
+        self.window.reserve(200)
+
+        entry, wait = self.window.reserve(300)
+        self.assertIsNone(entry)
+        self.assertEqual(wait, gemini_helper._TPM_WINDOW - 20)
+
+        self.clock.now += wait
+        entry, wait = self.window.reserve(300)
+        self.assertIsNotNone(entry)
+        self.assertEqual(wait, 0.0)
+        self.assertEqual(self.window.total, 500)
+
+    def test_request_larger_than_budget_runs_alone(self):
+        """Should admit an oversized request once the window is empty"""
+        entry, wait = self.window.reserve(5000)
+        self.assertIsNotNone(entry)
+
+        blocked, wait = self.window.reserve(1)
+        self.assertIsNone(blocked)
+
+        self.clock.now += wait
+        entry, _ = self.window.reserve(1)
+        self.assertIsNotNone(entry)
+
+    def test_settle_replaces_estimate(self):
+        """Should count the tokens Gemini reported instead of the estimate"""
+        entry, _ = self.window.reserve(100)
+        self.window.settle(entry, 850)
+
+        self.assertEqual(self.window.total, 850)
+        self.assertIsNone(self.window.reserve(100)[0])
+
+    def test_settle_after_expiry_is_ignored(self):
+        """Should not count a response whose reservation already left the window"""
+        entry, _ = self.window.reserve(100)
+        self.clock.now += gemini_helper._TPM_WINDOW
+        self.window.reserve(10)
+
+        self.window.settle(entry, 500)
+
+        self.assertEqual(self.window.total, 10)
+
+    def test_generate_sleeps_until_budget_frees(self):
+        """Should hold a request back until the window has room"""
+        helper = GeminiHelper()
+        helper.model = FakeModel()
+        self.window.reserve(900)
+
+        def sleep(seconds):
+            self.clock.now += seconds
+
+        with mock.patch.object(gemini_helper, '_TOKEN_WINDOW', self.window), \
+                mock.patch.object(gemini_helper.time, 'sleep', side_effect=sleep) as fake_sleep:
+            helper._generate_with_retry('x' * 400)
+
+        fake_sleep.assert_called_once_with(gemini_helper._TPM_WINDOW)
+        self.assertEqual(helper.model.calls, 1)
+
+
+class TestRetry(GeminiTestCase):
+    """Test backoff retries around Gemini calls"""
+
+    def test_recovers_from_transient_error(self):
+        """Should retry a 503 and return the next response"""
+        self.helper.model = FakeModel(errors=[ServiceUnavailable('503')])
+
+        response = self.helper._generate_with_retry('prompt')
+
+        self.assertEqual(response.text, VOCAB_RESPONSE)
+        self.assertEqual(self.helper.model.calls, 2)
+
+    def test_raises_after_retries_exhausted(self):
+        """Should give up after the last attempt with the last error"""
+        self.helper.model = FakeModel(errors=[ServiceUnavailable('503')] * 5)
+
+        with self.assertRaises(ServiceUnavailable):
+            self.helper._generate_with_retry('prompt')
+        self.assertEqual(self.helper.model.calls, gemini_helper._RETRY_ATTEMPTS)
+
+    def test_async_raises_after_retries_exhausted(self):
+        """Should give up after the last async attempt with the last error"""
+        self.helper.model = FakeModel(errors=[ServiceUnavailable('503')] * 5)
+
+        with self.assertRaises(ServiceUnavailable):
+            asyncio.run(self.helper._agenerate_with_retry('prompt'))
+        self.assertEqual(self.helper.model.calls, gemini_helper._RETRY_ATTEMPTS)
+
+    def test_non_transient_error_raised_immediately(self):
+        """Should not retry errors that won't go away"""
+        self.helper.model = FakeModel(errors=[ValueError('bad request')])
+
+        with self.assertRaises(ValueError):
+            self.helper._generate_with_retry('prompt')
+        self.assertEqual(self.helper.model.calls, 1)
+
+    def test_async_non_transient_error_raised_immediately(self):
+        """Should not retry errors that won't go away on the async path"""
+        self.helper.model = FakeModel(errors=[ValueError('bad request')])
+
+        with self.assertRaises(ValueError):
+            asyncio.run(self.helper._agenerate_with_retry('prompt'))
+        self.assertEqual(self.helper.model.calls, 1)
+
+    def test_exhausted_retries_fall_back(self):
+        """Should fall back to rule-based extraction once retries run out"""
+        self.helper.model = FakeModel(errors=[ServiceUnavailable('503')] * 5)
+
+        vocab = self.helper.extract_vocabulary_with_ai('I eat breakfast every morning.')
+
+        self.assertEqual(self.helper.model.calls, gemini_helper._RETRY_ATTEMPTS)
+        self.assertNotEqual(vocab[0]['word'], 'breakfast')
+
+
+if __name__ == '__main__':
+    unittest.main()
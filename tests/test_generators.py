@@ -12,6 +12,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../s
 from generators.fill_in_blank import FillInBlankGenerator
 from generators.flashcard import FlashcardGenerator
 from generators.spelling import SpellingGenerator
+from generators.advanced_cloze_generator import AdvancedClozeGenerator
+from generators.sentence_builder_generator import SentenceBuilderGenerator
 
 
 class TestFillInBlankGenerator(unittest.TestCase):
@@ -150,6 +152,66 @@ class TestSpellingGenerator(unittest.TestCase):
         self.assertEqual(len(words), len(unique_words), "Should not have duplicate words")
 
 
+class TestAdvancedClozeGenerator(unittest.TestCase):
+    """Test advanced cloze distractor generation"""
+    
+    def setUp(self):
+        self.generator = AdvancedClozeGenerator()
+    
+    def test_distractors_for_long_words(self):
+        """Should still produce 4 options for words longer than any generic distractor"""
+        options = self.generator._generate_distractors('internationalization', '')
+        
+        self.assertEqual(len(options), 4)
+        self.assertIn('internationalization', options)
+    
+    def test_distractors_exclude_correct_word(self):
+        """Should not repeat the correct word among distractors"""
+        options = self.generator._generate_distractors('complete', '')
+        
+        self.assertEqual(options.count('complete'), 1)
+
+    def test_generates_items_with_blank_parts(self):
+        """Should return items whose text parts surround each blank"""
+        sentences = [{
+            'text': 'You should practice speaking English every morning to improve your pronunciation quickly.'
+        }]
+
+        items = self.generator.generate(sentences, [], 'topic_1', 'lesson_1')
+
+        self.assertTrue(items, "Should generate an item from a quality sentence")
+        item = items[0]
+        self.assertEqual(item.id, 'ac_lesson_1_1')
+        self.assertEqual(item.topic_id, 'topic_1')
+        self.assertEqual(item.lesson_id, 'lesson_1')
+        self.assertIn(item.difficulty, ('easy', 'medium', 'hard'))
+        self.assertEqual(len(item.text_parts), len(item.correct) + 1)
+        self.assertEqual(len(item.options), len(item.correct))
+        for correct, options in zip(item.correct, item.options):
+            self.assertIn(correct, options)
+        self.assertEqual(''.join(part + word for part, word in zip(item.text_parts, item.correct + [''])),
+                         sentences[0]['text'])
+
+
+class TestSentenceBuilderGenerator(unittest.TestCase):
+    """Test sentence builder tokenization"""
+    
+    def setUp(self):
+        self.generator = SentenceBuilderGenerator()
+    
+    def test_tokenize_separates_punctuation(self):
+        """Should split punctuation into its own tokens"""
+        tokens = self.generator._tokenize_sentence('Hello,  world!')
+        
+        self.assertEqual(tokens, ['Hello', ',', 'world', '!'])
+    
+    def test_tokenize_keeps_apostrophes_and_hyphens(self):
+        """Should keep contractions and hyphenated words whole"""
+        tokens = self.generator._tokenize_sentence("It's a well-known fact.")
+        
+        self.assertEqual(tokens, ["It's", 'a', 'well-known', 'fact', '.'])
+
+
 class TestHebrewTranslations(unittest.TestCase):
     """Test Hebrew translation functionality"""
     
@@ -0,0 +1,82 @@
+"""
+Unit tests for the lesson orchestrator
+Validates the exercise cache between runs
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import main
+
+
+class TestExerciseCache(unittest.TestCase):
+    """Test reuse and invalidation of cached lesson exercises"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_path = Path(self.tmp.name) / main._EXERCISE_CACHE_FILE
+
+        # A stand-in source tree, so tests can touch files without editing the real ones
+        self.src_dir = Path(self.tmp.name) / 'src'
+        (self.src_dir / 'generators').mkdir(parents=True)
+        (self.src_dir / 'main.py').write_text('# orchestrator\n')
+        (self.src_dir / 'generators' / 'spelling.py').write_text('# generator\n')
+        patcher = mock.patch.object(main, '__file__', str(self.src_dir / 'main.py'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _touch(self, path: Path):
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_hit_for_unchanged_transcript_and_sources(self):
+        """Should reuse exercises saved under the same key and fingerprint"""
+        key = main._exercise_cache_key(1, 'I wake up at 7 AM.', False)
+        main._save_exercise_cache(self.cache_path, main._source_fingerprint(), {key: {'spelling': []}})
+
+        cache = main._load_exercise_cache(self.cache_path, main._source_fingerprint())
+
+        self.assertEqual(cache[main._exercise_cache_key(1, 'I wake up at 7 AM.', False)], {'spelling': []})
+
+    def test_miss_for_changed_transcript(self):
+        """Should not find an edited transcript under the old key"""
+        key = main._exercise_cache_key(1, 'I wake up at 7 AM.', False)
+        main._save_exercise_cache(self.cache_path, main._source_fingerprint(), {key: {'spelling': []}})
+
+        cache = main._load_exercise_cache(self.cache_path, main._source_fingerprint())
+
+        self.assertNotIn(main._exercise_cache_key(1, 'I wake up at 8 AM.', False), cache)
+
+    def test_miss_when_gemini_becomes_enabled(self):
+        """Should keep rule-based and AI results apart"""
+        self.assertNotEqual(main._exercise_cache_key(1, 'I wake up.', False),
+                            main._exercise_cache_key(1, 'I wake up.', True))
+
+    def test_invalidated_by_orchestrator_change(self):
+        """Should drop every entry once main.py itself changes"""
+        key = main._exercise_cache_key(1, 'I wake up at 7 AM.', False)
+        main._save_exercise_cache(self.cache_path, main._source_fingerprint(), {key: {'spelling': []}})
+
+        self._touch(self.src_dir / 'main.py')
+
+        self.assertEqual(main._load_exercise_cache(self.cache_path, main._source_fingerprint()), {})
+
+    def test_invalidated_by_generator_change(self):
+        """Should drop every entry once a generator changes"""
+        key = main._exercise_cache_key(1, 'I wake up at 7 AM.', False)
+        main._save_exercise_cache(self.cache_path, main._source_fingerprint(), {key: {'spelling': []}})
+
+        self._touch(self.src_dir / 'generators' / 'spelling.py')
+
+        self.assertEqual(main._load_exercise_cache(self.cache_path, main._source_fingerprint()), {})
+
+
+if __name__ == '__main__':
+    unittest.main()